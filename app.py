@@ -1,9 +1,12 @@
+from functools import cache, wraps
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import numpy as np
-from data_loader import *
-from visualizations import *
+
+import profiling
+from snapshot import DEFAULT_FILTERS, current_snapshot
+
+# Os módulos de dados e gráficos (pandas, plotly.express, pyarrow) são
+# importados dentro de cada seção, só quando ela é renderizada
 
 # Configuração da página
 st.set_page_config(
@@ -22,49 +25,158 @@ st.sidebar.title("Filtros")
 classe_social = st.sidebar.multiselect(
     "Classe Social",
     options=["C", "D", "E"],
-    default=["C", "D"]
+    default=DEFAULT_FILTERS["classe_social"]
 )
 
 faixa_etaria = st.sidebar.slider(
     "Faixa Etária",
     min_value=25,
     max_value=45,
-    value=(25, 35)
+    value=tuple(DEFAULT_FILTERS["faixa_etaria"])
 )
 
+REGIOES = ["Todas", "Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"]
 regiao = st.sidebar.selectbox(
     "Região",
-    options=["Todas", "Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"],
-    index=0
+    options=REGIOES,
+    index=REGIOES.index(DEFAULT_FILTERS["regiao"])
 )
 
+# Figuras pré-calculadas por snapshot.py; sem snapshot válido tudo é calculado ao vivo
+snapshot = current_snapshot()
+default_filters = snapshot is not None and snapshot.matches(classe_social, faixa_etaria, regiao)
+
+# Reruns de fragmentos listados no painel de desempenho
+FRAGMENT_RUNS_SHOWN = 20
+
+def profiled_fragment(name):
+    """Mede o corpo de um fragmento quando ele roda sozinho (interação dentro dele).
+
+    Num rerun completo o fragmento já está na seção da aba e roda direto.
+    Sozinho, vira a seção `name` com identificador próprio, listada no
+    painel de desempenho (e executada sob cProfile, se pedido).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if profiling.active():
+                return func(*args, **kwargs)
+            run_id = profiling.new_run_id()
+            runs = st.session_state.get("runs_fragmentos", [])
+            st.session_state["runs_fragmentos"] = runs[-(FRAGMENT_RUNS_SHOWN - 1):] + [run_id]
+            with profiling.section(name, run_id):
+                if st.session_state.get("cprofile_fragmentos"):
+                    result, dump, summary = profiling.profile_call(func, *args, **kwargs)
+                    st.session_state["cprofile"] = {"run": run_id, "dump": dump, "summary": summary}
+                else:
+                    result = func(*args, **kwargs)
+            if st.session_state.get("painel_desempenho"):
+                total = [item["seconds"] for item in profiling.records(run_id) if item["stage"] == "total"]
+                st.caption(f"{name}: {total[0] * 1000:.0f} ms neste rerun do fragmento")
+            return result
+        return wrapper
+    return decorator
+
 # Download botão
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Exportar Dados")
-st.sidebar.download_button(
-    label="Download PDF",
-    data=b"Placeholder para PDF real",
-    file_name="pobishop_analise.pdf",
-    mime="application/pdf"
+
+@profiled_fragment("Relatório PDF")
+def render_report_export():
+    """Agenda o relatório PDF no pool de processos e oferece o download."""
+    key = st.session_state.get("relatorio")
+    if st.button("Gerar relatório PDF"):
+        from report import collect_report_data, report_manager
+        key = report_manager.submit(collect_report_data(classe_social, faixa_etaria, regiao))
+        st.session_state["relatorio"] = key
+    
+    # O módulo de relatório só é carregado depois do primeiro pedido
+    status = None
+    if key:
+        from report import report_manager
+        status = report_manager.status(key)
+    # Ao mudar de estado, refaz a página para ligar/desligar a consulta periódica
+    if status != st.session_state.get("relatorio_status"):
+        st.session_state["relatorio_status"] = status
+        st.rerun()
+    
+    if status == "gerando":
+        st.caption("Gerando relatório em segundo plano...")
+    elif status == "pronto":
+        st.download_button(
+            label="Download PDF",
+            data=report_manager.result(key),
+            file_name="pobishop_analise.pdf",
+            mime="application/pdf"
+        )
+    elif status == "erro":
+        st.error(f"Falha ao gerar o relatório: {report_manager.result(key)}")
+
+# Enquanto o relatório é gerado, só este trecho é reexecutado a cada 2s
+# Identificador deste rerun nas medições (o relatório já é medido dentro dele)
+run_id = profiling.new_run_id()
+with st.sidebar, profiling.section("Relatório PDF", run_id):
+    report_polling = st.session_state.get("relatorio_status") == "gerando"
+    st.fragment(render_report_export, run_every=2 if report_polling else None)()
+
+# Navegação
+st.sidebar.markdown("---")
+st.sidebar.markdown("### Navegação")
+lazy_tabs = st.sidebar.toggle(
+    "Carregar apenas a aba ativa",
+    value=True,
+    help="Executa somente a aba selecionada a cada interação."
 )
 
-# Abas principais
-tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-    "Visão Geral", 
-    "Público-Alvo", 
-    "Competitivo", 
-    "Produtos", 
-    "Finanças",
-    "SWOT",
-    "Fornecedores"
-])
+# Desempenho
+st.sidebar.markdown("---")
+st.sidebar.markdown("### Desempenho")
+debug_panel = st.sidebar.toggle(
+    "Painel de desempenho",
+    value=False,
+    key="painel_desempenho",
+    help="Mostra o tempo de dados, figuras e envio de cada seção."
+)
+capture_profile = debug_panel and st.sidebar.button(
+    "Capturar cProfile deste rerun",
+    help="Executa as seções sob cProfile e oferece o dump para download."
+)
+if debug_panel:
+    st.sidebar.toggle(
+        "Capturar cProfile dos fragmentos",
+        key="cprofile_fragmentos",
+        help="Cada interação com calculadoras e detalhamentos roda sob cProfile."
+    )
+
+def show_chart(fig):
+    """Envia a figura ao navegador medindo o tempo de serialização."""
+    with profiling.timed("envio", fig.layout.title.text or "figura"):
+        st.plotly_chart(fig, use_container_width=True)
+
+def snapshot_chart(name, build, use_snapshot=True):
+    """Mostra a figura `name` do snapshot ou, sem ela, a constrói ao vivo com build().
+
+    `use_snapshot` é falso quando filtros ou controles saem do padrão do build.
+    """
+    fig = snapshot.figure(name) if snapshot is not None and use_snapshot else None
+    show_chart(fig if fig is not None else build())
+
+def format_brl(value):
+    """Formata um valor em reais sem centavos (R$ 222.000)."""
+    return "R$ " + f"{value:,.0f}".replace(",", ".")
 
 # Tab 1: Visão Geral do Mercado
-with tab1:
+def render_overview():
+    """Renderiza a aba de visão geral do mercado."""
+    from data_loader import load_market_overview_data
+    from macro import describe, get_feed, macro_kpis
+    from visualizations import create_growth_chart, create_region_map
     st.header("Visão Geral do Mercado")
     
-    # Carregar dados
-    df_geo, df_growth, kpis = load_market_overview_data()
+    # Carregar dados (inflação e Selic: último valor bom do feed em segundo plano)
+    kpis = snapshot.value("kpis") if snapshot is not None else load_market_overview_data()[2]
+    macro = get_feed().snapshot()
+    kpis.update(macro_kpis(macro))
     
     # KPIs em colunas
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -78,13 +190,14 @@ with tab1:
         st.metric("Inflação", kpis["Inflação"])
     with col5:
         st.metric("Taxa Selic", kpis["Taxa Selic"])
+    st.caption(describe(macro))
     
     # Mapa e gráfico de tendência
     col1, col2 = st.columns(2)
     with col1:
-        st.plotly_chart(create_region_map(df_geo), use_container_width=True)
+        snapshot_chart("regioes", lambda: create_region_map(load_market_overview_data()[0]))
     with col2:
-        st.plotly_chart(create_growth_chart(df_growth), use_container_width=True)
+        snapshot_chart("crescimento", lambda: create_growth_chart(load_market_overview_data()[1]))
     
     # Contexto do mercado
     st.subheader("Contexto do Mercado")
@@ -96,45 +209,82 @@ with tab1:
     """)
 
 # Tab 2: Público-Alvo
-with tab2:
+def render_audience():
+    """Renderiza a aba de público-alvo."""
+    import pandas as pd
+    from data_loader import load_target_audience_data
+    from filters import load_audience_cube
+    from personas import load_persona_assignment
+    from visualizations import (create_age_pyramid, create_behavior_radar, create_income_chart,
+                                create_persona_radar, create_region_map)
     st.header("Análise do Público-Alvo")
     
     # Carregar dados
-    df_demo, df_income, df_behavior, personas = load_target_audience_data()
+    _, _, df_behavior, personas = load_target_audience_data()
+    
+    # Aplica os filtros da sidebar como recorte do cubo pré-agregado
+    audience = cache(lambda: load_audience_cube().summarize(classe_social, faixa_etaria, regiao))
+    if default_filters:
+        publico = snapshot.value("publico")
+    else:
+        publico = {"total": audience()[3], "clientes": load_audience_cube().n_rows}
+    st.caption(f"{publico['total']:,} de {publico['clientes']:,} clientes no filtro".replace(",", "."))
     
     # Gráficos demográficos
     col1, col2 = st.columns(2)
     with col1:
-        st.plotly_chart(create_age_pyramid(df_demo), use_container_width=True)
+        snapshot_chart("piramide", lambda: create_age_pyramid(audience()[0]), default_filters)
     with col2:
-        st.plotly_chart(create_income_chart(df_income), use_container_width=True)
+        snapshot_chart("renda", lambda: create_income_chart(audience()[1]), default_filters)
+    
+    def persona_radar():
+        # Radar por persona quando a base traz as pontuações de comportamento
+        df_profiles = load_persona_assignment().profiles()
+        if len(df_profiles):
+            return create_persona_radar(df_profiles)
+        return create_behavior_radar(df_behavior)
     
-    # Radar de comportamento
-    st.plotly_chart(create_behavior_radar(df_behavior), use_container_width=True)
+    # Público por região e radar de comportamento
+    col1, col2 = st.columns(2)
+    with col1:
+        snapshot_chart("publico_regioes", lambda: create_region_map(audience()[2]), default_filters)
+    with col2:
+        snapshot_chart("radar", persona_radar)
     
-    # Personas
+    # Personas, com a quantidade de clientes atribuída a cada uma (toda a base)
     st.subheader("Personas da Pobishop")
+    if snapshot is not None:
+        df_personas = pd.DataFrame(snapshot.value("personas"))
+    else:
+        df_personas = load_persona_assignment().summary()
     cols = st.columns(5)
     for i, persona in enumerate(personas):
         with cols[i]:
             st.markdown(f"### {persona['Nome']}")
+            clientes = df_personas.loc[i, "Clientes"]
+            st.metric("Clientes", f"{clientes:,}".replace(",", "."),
+                      f"{df_personas.loc[i, 'Participacao']:.1f}% da base", delta_color="off")
             st.markdown(f"**Idade:** {persona['Idade']}")
             st.markdown(f"**Ocupação:** {persona['Ocupacao']}")
             st.markdown(f"**Perfil:** {persona['Descricao']}")
 
 # Tab 3: Análise Competitiva
-with tab3:
+def render_competition():
+    """Renderiza a aba de análise competitiva."""
+    from data_loader import load_competitive_data, load_products_data
+    from spatial import load_competitive_positioning
+    from visualizations import create_competitor_map, create_market_share
     st.header("Análise Competitiva")
     
-    # Carregar dados
-    df_competitors = load_competitive_data()
-    
-    # Gráficos de competidores
+    # Gráficos de competidores (posições calculadas do catálogo de SKUs e dos nossos produtos)
     col1, col2 = st.columns(2)
     with col1:
-        st.plotly_chart(create_competitor_map(df_competitors), use_container_width=True)
+        snapshot_chart("mapa_concorrentes",
+                       lambda: create_competitor_map(*load_competitive_positioning()))
     with col2:
-        st.plotly_chart(create_market_share(df_competitors), use_container_width=True)
+        snapshot_chart("market_share", lambda: create_market_share(load_competitive_data()))
+    
+    render_nearest_competitors(load_products_data())
     
     # Análise de diferenciação
     st.subheader("Diferencial Competitivo da Pobishop")
@@ -147,8 +297,50 @@ with tab3:
     4. **Comunidade**: Criação de senso de pertencimento entre consumidores
     """)
 
+def render_nearest_competitors(df_products):
+    """Mostra os SKUs concorrentes mais próximos de um produto (índice espacial)."""
+    from spatial import load_catalog_index
+    
+    st.subheader("Concorrentes Diretos por Produto")
+    catalog_index = load_catalog_index()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        produto = st.selectbox("Produto", df_products["Produto"].tolist())
+    with col2:
+        vizinhos = st.slider("SKUs mais próximos", 5, 50, 10)
+    with col3:
+        faixa_preco = st.slider("Faixa de preço (±%)", 5, 50, 10)
+    
+    product = df_products[df_products["Produto"] == produto].iloc[0]
+    categoria = str(product["Categoria"])
+    preco, qualidade = float(product["Preco"]), float(product["Qualidade"])
+    df_nearest = catalog_index.nearest(categoria, preco, qualidade, k=vizinhos)
+    concorrentes = catalog_index.count_in_box(
+        categoria,
+        (preco * (1 - faixa_preco / 100), preco * (1 + faixa_preco / 100)),
+        (qualidade - 5, qualidade + 5)
+    )
+    
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.metric("SKUs concorrentes na faixa", f"{concorrentes:,}".replace(",", "."),
+                  help=f"{categoria}, preço ±{faixa_preco}% e qualidade ±5 pontos")
+        st.metric("Preço mediano dos vizinhos", f"R$ {df_nearest['Preco'].median():.2f}"
+                  if len(df_nearest) else "-")
+    with col2:
+        st.dataframe(df_nearest[["SKU", "Concorrente", "Preco", "Qualidade", "Distancia"]],
+                     hide_index=True,
+                     column_config={
+                         "Preco": st.column_config.NumberColumn("Preço", format="R$ %.2f"),
+                         "Qualidade": st.column_config.NumberColumn(format="%.1f"),
+                         "Distancia": st.column_config.NumberColumn("Distância", format="%.3f"),
+                     })
+
 # Tab 4: Produtos e Precificação
-with tab4:
+def render_products():
+    """Renderiza a aba de produtos e precificação."""
+    from data_loader import load_products_data
+    from visualizations import create_price_demand
     st.header("Análise de Produtos e Precificação")
     
     # Carregar dados
@@ -157,9 +349,37 @@ with tab4:
     # Gráficos de produtos
     col1, col2 = st.columns(2)
     with col1:
-        st.plotly_chart(create_product_treemap(df_products), use_container_width=True)
+        render_product_treemap(df_products)
     with col2:
-        st.plotly_chart(create_price_demand(df_products), use_container_width=True)
+        snapshot_chart("preco_demanda", lambda: create_price_demand(df_products))
+    
+    render_margin_simulator()
+    render_sensitivity_analysis(df_products)
+    
+    # Tabela de produtos populares
+    st.subheader("Produtos com Maior Potencial")
+    st.dataframe(df_products.sort_values("Demanda", ascending=False))
+
+# Detalhamento em fragmento: escolher um nó reexecuta só o gráfico
+@st.fragment
+@profiled_fragment("Treemap de produtos")
+def render_product_treemap(df_products):
+    """Treemap de produtos com top-N por categoria e detalhamento de uma categoria."""
+    from visualizations import DRILL_TOP_N, HIERARCHY_TOP_N, create_product_treemap
+    
+    categorias = sorted(df_products["Categoria"].astype(str).unique())
+    categoria = st.selectbox("Detalhar categoria", ["Todas"] + categorias)
+    if categoria == "Todas":
+        snapshot_chart("treemap", lambda: create_product_treemap(df_products, top_n=HIERARCHY_TOP_N))
+    else:
+        show_chart(create_product_treemap(df_products, top_n=DRILL_TOP_N, focus=(categoria,)))
+
+# Calculadoras em fragmentos: mexer num controle reexecuta só a calculadora
+@st.fragment
+@profiled_fragment("Simulador de margem")
+def render_margin_simulator():
+    """Simulador de margem de um produto."""
+    from pricing import suggested_price
     
     # Simulador de margem
     st.subheader("Simulador de Margem de Produto")
@@ -169,49 +389,167 @@ with tab4:
     with col2:
         taxa_imposto = st.slider("Taxa de Importação (%)", min_value=0, max_value=100, value=20)
     with col3:
-        margem_desejada = st.slider("Margem Desejada (%)", min_value=10, max_value=200, value=70)
+        # Margem sobre o preço de venda: 100% ou mais não tem preço possível
+        margem_desejada = st.slider("Margem Desejada (%)", min_value=10, max_value=95, value=70)
     
     # Cálculo da margem
-    custo_imposto = preco_custo * (taxa_imposto / 100)
-    custo_total = preco_custo + custo_imposto
-    preco_venda = custo_total / (1 - (margem_desejada / 100))
+    preco_venda = suggested_price(preco_custo, taxa_imposto, margem_desejada)
     
     st.metric("Preço de Venda Sugerido", f"R$ {preco_venda:.2f}")
-    
-    # Tabela de produtos populares
-    st.subheader("Produtos com Maior Potencial")
-    st.dataframe(df_products.sort_values("Demanda", ascending=False))
+
+@st.fragment
+@profiled_fragment("Sensibilidade em lote")
+def render_sensitivity_analysis(df_products):
+    """Sensibilidade em lote: todos os produtos x faixas de imposto e margem."""
+    from pricing import (BatchResult, product_costs, rate_range, sensitivity_summary,
+                         write_sensitivity_csv)
+    from visualizations import create_margin_heatmap
+    
+    with st.expander("Análise de Sensibilidade em Lote"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            faixa_imposto = st.slider("Faixa de Imposto (%)", min_value=0, max_value=100, value=(0, 100))
+        with col2:
+            faixa_margem = st.slider("Faixa de Margem (%)", min_value=10, max_value=95, value=(10, 90))
+        with col3:
+            passo = st.select_slider("Resolução (p.p.)", options=[5.0, 1.0, 0.5, 0.1], value=1.0)
+        
+        tax_rates = rate_range(*faixa_imposto, passo)
+        margins = rate_range(*faixa_margem, passo)
+        costs = product_costs(df_products)
+        st.caption(f"{len(costs) * len(tax_rates) * len(margins):,} cenários calculados".replace(",", "."))
+        
+        summary = sensitivity_summary(costs, tax_rates, margins)
+        # Limita a resolução enviada ao navegador (~200 x 200 células)
+        df_media = summary["media"]
+        stride_y = max(1, len(tax_rates) // 200)
+        stride_x = max(1, len(margins) // 200)
+        show_chart(create_margin_heatmap(df_media.iloc[::stride_y, ::stride_x]))
+        
+        # O CSV do grid é gravado em disco bloco a bloco e vale para as faixas atuais
+        grade = (faixa_imposto, faixa_margem, passo)
+        resultado = st.session_state.get("sensibilidade_lote")
+        if resultado is not None and (resultado.stats["grade"] != grade or not resultado.exists()):
+            del st.session_state["sensibilidade_lote"]
+            resultado.discard()
+            resultado = None
+        if resultado is None and st.button("Gerar CSV do grid completo"):
+            resultado = BatchResult("sensibilidade", suffix=".csv.gz")
+            linhas = write_sensitivity_csv(df_products["Produto"], costs, tax_rates, margins, resultado.path)
+            resultado.stats = {"linhas": linhas, "grade": grade}
+            st.session_state["sensibilidade_lote"] = resultado
+        if resultado is not None:
+            if resultado.downloadable():
+                st.download_button(
+                    label=f"Download do grid completo (CSV.gz, {resultado.size() / 2**20:.1f} MB)",
+                    data=resultado.read_bytes,
+                    file_name="pobishop_sensibilidade.csv.gz",
+                    mime="application/gzip"
+                )
+            else:
+                st.warning("O grid comprimido passa do limite de download; use um passo maior.")
 
 # Tab 5: Projeções Financeiras
-with tab5:
+def render_finance():
+    """Renderiza a aba de projeções financeiras."""
+    from data_loader import load_financial_data
+    from simulations import DEFAULT_PREMISES, RELATIVE_ACCURACY, headline, simulate_premises
+    from visualizations import (create_break_even_chart, create_fan_chart,
+                                create_investment_chart, create_revenue_chart)
     st.header("Projeções Financeiras")
     
-    # Carregar dados
-    df_revenue, df_investment = load_financial_data()
-    
     # Gráficos financeiros
     col1, col2 = st.columns(2)
     with col1:
-        st.plotly_chart(create_revenue_chart(df_revenue), use_container_width=True)
+        snapshot_chart("receita", lambda: create_revenue_chart(load_financial_data()[0]))
     with col2:
-        st.plotly_chart(create_investment_chart(df_investment), use_container_width=True)
+        snapshot_chart("investimento", lambda: create_investment_chart(load_financial_data()[1]))
+    
+    # Premissas da simulação
+    with st.expander("Premissas da Simulação"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            n_paths = st.select_slider("Cenários simulados",
+                                       options=[100_000, 250_000, 500_000, 1_000_000],
+                                       value=DEFAULT_PREMISES["n_paths"],
+                                       format_func=lambda n: f"{n:,}".replace(",", "."))
+            custo_fixo = st.number_input("Custo Fixo Mensal (R$)", min_value=0.0,
+                                         value=DEFAULT_PREMISES["custo_fixo"], step=100.0)
+        with col2:
+            custo_variavel = st.slider("Custo Variável (% da receita)", 30, 90,
+                                       DEFAULT_PREMISES["custo_variavel"])
+            volatilidade_custo = st.slider("Incerteza do Custo Variável (p.p.)", 0, 20,
+                                           DEFAULT_PREMISES["volatilidade_custo"])
+        with col3:
+            volatilidade_nivel = st.slider("Incerteza da Demanda (%)", 0, 50,
+                                           DEFAULT_PREMISES["volatilidade_nivel"])
+            volatilidade_mensal = st.slider("Oscilação Mensal (%)", 0, 30,
+                                            DEFAULT_PREMISES["volatilidade_mensal"])
+    
+    premissas = {
+        "n_paths": n_paths,
+        "custo_fixo": custo_fixo,
+        "custo_variavel": custo_variavel,
+        "volatilidade_custo": volatilidade_custo,
+        "volatilidade_nivel": volatilidade_nivel,
+        "volatilidade_mensal": volatilidade_mensal,
+    }
+    # Nas premissas padrão, resultados e gráficos da simulação vêm do snapshot
+    default_premises = premissas == DEFAULT_PREMISES
+    simulation = cache(lambda: simulate_premises(load_financial_data()[0]["Receita"].tolist(),
+                                                 premissas))
+    if snapshot is not None and default_premises:
+        resumo = snapshot.value("simulacao")
+    else:
+        resumo = headline(simulation())
     
     # Projeção ano 1
-    st.subheader("Projeção Simplificada - Ano 1")
+    st.subheader("Projeção Simulada - Ano 1")
     
+    percentis = resumo["resultado_ano1_percentis"]
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Receita Total Projetada", "R$ 222.000")
+        st.metric("Receita Total Projetada", format_brl(resumo["receita_ano1"]))
     with col2:
-        st.metric("Custos Totais", "R$ 175.560")
+        st.metric("Custos Totais", format_brl(resumo["custos_ano1"]))
     with col3:
-        st.metric("Resultado Operacional", "R$ 46.440")
+        st.metric("Resultado Operacional", format_brl(resumo["resultado_ano1"]),
+                  help=f"P5: {format_brl(percentis['P5'])} · P95: {format_brl(percentis['P95'])}")
     
     # Ponto de equilíbrio
-    st.success("**Ponto de Equilíbrio:** Será atingido entre os meses 6 e 9 de operação.")
+    p25, p75 = resumo["break_even_p25"], resumo["break_even_p75"]
+    if p75 is not None:
+        st.success(f"**Ponto de Equilíbrio:** Será atingido entre os meses {p25} e {p75} "
+                   f"de operação (metade central dos cenários).")
+    elif p25 is not None:
+        st.warning(f"**Ponto de Equilíbrio:** A partir do mês {p25} em parte dos cenários; "
+                   f"mais de 25% não se pagam em {resumo['meses']} meses.")
+    else:
+        st.error("**Ponto de Equilíbrio:** Não é atingido na maioria dos cenários simulados.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        snapshot_chart("resultado_simulado",
+                       lambda: create_fan_chart(simulation()["faixas_resultado"],
+                                                "Resultado Operacional Acumulado", "Resultado (R$)"),
+                       default_premises)
+    with col2:
+        snapshot_chart("break_even", lambda: create_break_even_chart(simulation()["break_even"]),
+                       default_premises)
+    snapshot_chart("receita_simulada",
+                   lambda: create_fan_chart(simulation()["faixas_receita"],
+                                            "Receita Mensal Simulada", "Receita (R$)"),
+                   default_premises)
+    cenarios = f"{resumo['n_paths']:,}".replace(",", ".")
+    st.caption(f"{cenarios} cenários de Monte Carlo; faixas de percentis P5-P95 e P25-P75 "
+               f"sobre todos os cenários, estimadas por sketch com erro de até "
+               f"{RELATIVE_ACCURACY:.0%} do valor.")
 
 # Tab 6: Análise SWOT
-with tab6:
+def render_swot():
+    """Renderiza a aba de análise SWOT e riscos."""
+    from data_loader import load_swot_data
+    from visualizations import create_risk_heatmap
     st.header("Análise SWOT e Riscos")
     
     # Carregar dados
@@ -240,7 +578,7 @@ with tab6:
     
     # Mapa de risco
     st.subheader("Matriz de Riscos")
-    st.plotly_chart(create_risk_heatmap(df_risk), use_container_width=True)
+    snapshot_chart("riscos", lambda: create_risk_heatmap(df_risk))
     
     # Plano de mitigação
     st.subheader("Plano de Mitigação de Riscos Prioritários")
@@ -257,7 +595,10 @@ with tab6:
     """)
 
 # Tab 7: Fornecedores e Logística
-with tab7:
+def render_suppliers():
+    """Renderiza a aba de fornecedores e logística."""
+    from data_loader import load_supplier_data
+    from visualizations import create_supplier_chart
     st.header("Fornecedores e Logística")
     
     # Carregar dados
@@ -266,24 +607,78 @@ with tab7:
     # Gráficos de fornecedores
     col1, col2 = st.columns(2)
     with col1:
-        st.plotly_chart(create_supplier_chart(df_suppliers), use_container_width=True)
+        snapshot_chart("prazos", lambda: create_supplier_chart(df_suppliers))
     with col2:
-        st.plotly_chart(create_product_flow(df_suppliers), use_container_width=True)
+        render_product_flow(df_suppliers)
+    
+    # Prazos medidos nas entregas (sketches de quantis por fornecedor)
+    st.dataframe(
+        df_suppliers[["Fornecedor", "Origem", "Prazo_Entrega", "Pedidos", "P50", "P90", "P99",
+                      "Taxa_No_Prazo"]],
+        hide_index=True,
+        column_config={
+            "Prazo_Entrega": st.column_config.NumberColumn("Prometido (dias)"),
+            "P50": st.column_config.NumberColumn("p50 (dias)", format="%.1f"),
+            "P90": st.column_config.NumberColumn("p90 (dias)", format="%.1f"),
+            "P99": st.column_config.NumberColumn("p99 (dias)", format="%.1f"),
+            "Taxa_No_Prazo": st.column_config.ProgressColumn("No prazo", format="percent",
+                                                             min_value=0, max_value=1),
+        }
+    )
+    
+    render_import_calculator()
+    
+    # Estratégia de fornecimento
+    st.subheader("Estratégia de Fornecimento")
+    st.markdown("""
+    **Composição inicial:** 60% produtos internacionais / 40% nacionais
+    
+    **Evolução planejada:** Atingir 40% internacionais / 60% nacionais até final de 2025
+    
+    **Critérios de seleção de fornecedores:**
+    - Confiabilidade de entrega
+    - Qualidade consistente dos produtos
+    - Comunicação eficiente
+    - Flexibilidade em pequenos pedidos
+    """)
+
+@st.fragment
+@profiled_fragment("Fluxo de fornecimento")
+def render_product_flow(df_suppliers):
+    """Sunburst de fornecimento com top-N por origem e detalhamento de uma origem."""
+    from visualizations import DRILL_TOP_N, HIERARCHY_TOP_N, create_product_flow
+    
+    origens = sorted(df_suppliers["Origem"].astype(str).unique())
+    origem = st.selectbox("Detalhar origem", ["Todas"] + origens)
+    if origem == "Todas":
+        snapshot_chart("fluxo", lambda: create_product_flow(df_suppliers, top_n=HIERARCHY_TOP_N))
+    else:
+        show_chart(create_product_flow(df_suppliers, top_n=DRILL_TOP_N, focus=(origem,)))
+
+@st.fragment
+@profiled_fragment("Calculadora de importação")
+def render_import_calculator():
+    """Calculadora de custos de importação, unitária e em lote."""
+    from macro import describe, get_feed
+    from pricing import BatchResult, import_costs, process_import_csv
     
     # Calculadora de importação
     st.subheader("Calculadora de Custos de Importação")
+    macro = get_feed().snapshot()
+    # O câmbio começa na cotação atual; depois vale o que o usuário digitar
+    if "taxa_cambio" not in st.session_state:
+        st.session_state["taxa_cambio"] = round(min(max(macro["cambio"], 1.0), 10.0), 4)
     col1, col2, col3 = st.columns(3)
     with col1:
         valor_produto = st.number_input("Valor do Produto (USD)", min_value=1.0, max_value=500.0, value=20.0)
     with col2:
-        taxa_cambio = st.number_input("Taxa de Câmbio (R$/USD)", min_value=1.0, max_value=10.0, value=5.2)
+        taxa_cambio = st.number_input("Taxa de Câmbio (R$/USD)", min_value=1.0, max_value=10.0,
+                                      key="taxa_cambio", help=describe(macro))
     with col3:
         taxa_importacao = st.slider("Imposto de Importação (%)", min_value=0, max_value=100, value=60)
     
     # Cálculos
-    valor_reais = valor_produto * taxa_cambio
-    imposto = valor_reais * (taxa_importacao / 100)
-    valor_final = valor_reais + imposto
+    valor_reais, imposto, valor_final = import_costs(valor_produto, taxa_cambio, taxa_importacao)
     
     # Resultados
     col1, col2, col3 = st.columns(3)
@@ -294,19 +689,154 @@ with tab7:
     with col3:
         st.metric("Valor Final", f"R$ {valor_final:.2f}")
     
-    # Estratégia de fornecimento
-    st.subheader("Estratégia de Fornecimento")
-    st.markdown("""
-    **Composição inicial:** 60% produtos internacionais / 40% nacionais
-    
-    **Evolução planejada:** Atingir 40% internacionais / 60% nacionais até final de 2025
-    
-    **Critérios de seleção de fornecedores:**
-    - Confiabilidade de entrega
-    - Qualidade consistente dos produtos
-    - Comunicação eficiente
-    - Flexibilidade em pequenos pedidos
-    """)
+    # Cálculo em lote a partir de um CSV de SKUs
+    with st.expander("Cálculo em Lote (CSV de SKUs)"):
+        st.markdown(
+            "Envie um CSV com a coluna **Valor_USD** e, opcionalmente, "
+            "**Taxa_Importacao** (%) por linha. O câmbio e o imposto acima "
+            "são usados como padrão."
+        )
+        arquivo = st.file_uploader("Arquivo de SKUs", type=["csv", "gz"])
+        if arquivo is not None and st.button("Processar arquivo"):
+            previous = st.session_state.pop("importacao_lote", None)
+            if previous is not None:
+                previous.discard()
+            # O arquivo do resultado vive enquanto o objeto estiver no session_state
+            lote = BatchResult(arquivo.name, suffix=".csv.gz")
+            try:
+                lote.stats = process_import_csv(
+                    arquivo, lote.path, taxa_cambio, taxa_importacao,
+                    compression="gzip" if arquivo.name.endswith(".gz") else None,
+                    compress_output=True
+                )
+            except (ValueError, OSError) as error:
+                lote.discard()
+                st.error(f"Não foi possível processar o arquivo: {error}")
+            else:
+                st.session_state["importacao_lote"] = lote
+        
+        resultado = st.session_state.get("importacao_lote")
+        if resultado is not None and not resultado.exists():
+            # Removido pela varredura por idade: o usuário precisa processar de novo
+            del st.session_state["importacao_lote"]
+            resultado = None
+        if resultado is not None:
+            stats = resultado.stats
+            st.caption(
+                f"{resultado.name}: {stats['linhas']:,} linhas em {stats['segundos']:.2f}s "
+                f"({stats['linhas_por_segundo']:,.0f} linhas/s)".replace(",", ".")
+            )
+            # Comprimido, o arquivo entregue no clique ocupa bem menos memória do servidor
+            if resultado.downloadable():
+                st.download_button(
+                    label=f"Download do CSV calculado (CSV.gz, {resultado.size() / 2**20:.1f} MB)",
+                    data=resultado.read_bytes,
+                    file_name="pobishop_importacao_lote.csv.gz",
+                    mime="application/gzip"
+                )
+            else:
+                st.warning("O resultado comprimido passa do limite de download; divida o arquivo de SKUs.")
+
+# Abas principais
+SECTIONS = {
+    "Visão Geral": render_overview,
+    "Público-Alvo": render_audience,
+    "Competitivo": render_competition,
+    "Produtos": render_products,
+    "Finanças": render_finance,
+    "SWOT": render_swot,
+    "Fornecedores": render_suppliers
+}
+
+# Com a navegação sob demanda, as abas ocultas não são executadas
+# (tab.open é False); o estado da aba ativa fica em st.session_state["secao"]
+tabs = st.tabs(
+    list(SECTIONS),
+    key="secao",
+    on_change="rerun" if lazy_tabs else "ignore"
+)
+
+def render_sections(run_id):
+    """Renderiza as abas abertas, medindo cada seção."""
+    for (label, render), tab in zip(SECTIONS.items(), tabs):
+        if tab.open is False:
+            continue
+        with tab, profiling.section(label, run_id):
+            render()
+
+def render_debug_panel(run_id):
+    """Mostra no sidebar as medições do rerun atual e as estatísticas de cache."""
+    import pandas as pd
+    from cache import cache_stats, figure_cache
+    from datasets import registry
+    
+    with st.sidebar.expander("Medições do último rerun", expanded=True):
+        df_timings = pd.DataFrame(profiling.records(run_id))
+        if not df_timings.empty:
+            df_timings["ms"] = (df_timings["seconds"] * 1000).round(1)
+            totals = df_timings[df_timings["stage"] == "total"]
+            for _, row in totals.iterrows():
+                st.metric(row["name"], f"{row['ms']:.0f} ms")
+            st.dataframe(
+                df_timings[df_timings["stage"] != "total"][["section", "stage", "name", "ms", "cached"]],
+                hide_index=True
+            )
+        
+        # Interações dentro de fragmentos não passam pelo rerun completo
+        fragment_runs = set(st.session_state.get("runs_fragmentos", []))
+        df_fragments = pd.DataFrame([item for item in profiling.records()
+                                     if item["run"] in fragment_runs and item["stage"] == "total"])
+        if not df_fragments.empty:
+            st.markdown("**Reruns de fragmentos**")
+            df_fragments["ms"] = (df_fragments["seconds"] * 1000).round(1)
+            st.dataframe(df_fragments[["run", "section", "ms"]].iloc[::-1], hide_index=True)
+        
+        st.download_button(
+            label="Exportar medições (JSONL)",
+            data=lambda: profiling.to_jsonl(profiling.records()),
+            file_name="pobishop_medicoes.jsonl",
+            mime="application/x-ndjson"
+        )
+        
+        figures = figure_cache.stats()
+        st.caption(
+            f"Cache de figuras: {figures['hits']} acertos, {figures['misses']} faltas, "
+            f"{figures['size_mb']:.1f}/{figures['max_mb']:.0f} MB"
+        )
+        loaders = cache_stats()
+        st.caption(
+            f"Cache de dados: {sum(s['hits'] for s in loaders.values())} acertos, "
+            f"{sum(s['misses'] for s in loaders.values())} faltas"
+        )
+        st.caption(f"Snapshot: {snapshot.version}" if snapshot is not None
+                   else "Snapshot: nenhum válido (cálculo ao vivo)")
+    
+    with st.sidebar.expander("Memória dos datasets"):
+        df_memory = registry.memory_report()
+        st.dataframe(df_memory.round(2), hide_index=True)
+        st.caption(
+            f"Compartilhados pelo processo: {df_memory['MB'].sum():.1f} MB "
+            f"(eram {df_memory['MB original'].sum():.1f} MB sem compactação)"
+        )
+        
+        captured = st.session_state.get("cprofile")
+        if captured is not None:
+            st.download_button(
+                label="Download cProfile (.prof)",
+                data=captured["dump"],
+                file_name=f"pobishop_rerun_{captured['run']}.prof",
+                mime="application/octet-stream"
+            )
+            st.code(captured["summary"], language=None)
+
+if capture_profile:
+    _, dump, summary = profiling.profile_call(render_sections, run_id)
+    st.session_state["cprofile"] = {"run": run_id, "dump": dump, "summary": summary}
+else:
+    render_sections(run_id)
+
+if debug_panel:
+    render_debug_panel(run_id)
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,120 @@
+"""Mede o cold start do dashboard: import de cada módulo e primeira renderização.
+
+Uso:
+    python benchmarks/coldstart.py [--budget 5.0] [--json saida.json]
+
+Cada medição roda num interpretador novo, como um pod recém-criado. O
+script termina com código 1 se a primeira renderização passar do orçamento.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Dependências externas e módulos do app, na ordem em que costumam ser carregados
+MODULES = [
+    "streamlit",
+    "numpy",
+    "pandas",
+    "pyarrow",
+    "plotly.graph_objects",
+    "plotly.express",
+    "cache",
+    "data_loader",
+    "visualizations",
+    "filters",
+    "pricing",
+    "report",
+    "simulations",
+    "sales",
+    "datasets",
+    "macro",
+    "leadtime",
+    "spatial",
+    "personas",
+    "snapshot",
+]
+
+# Orçamento padrão (segundos) do processo novo até a primeira página completa
+DEFAULT_BUDGET = 5.0
+
+FIRST_RENDER_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+first = time.perf_counter()
+at.run()
+second = time.perf_counter()
+print(json.dumps({{
+    "harness_s": harness - start,
+    "first_render_s": first - harness,
+    "warm_rerun_s": second - first,
+    "exception": [str(e.value) for e in at.exception],
+}}))
+"""
+
+
+def _run_python(args):
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def import_time(module):
+    """Tempo cumulativo (ms) de importar `module` num interpretador novo."""
+    result = _run_python(["-X", "importtime", "-c", f"import {module}"])
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1000
+    return None
+
+
+def first_render():
+    """Tempo da primeira execução completa de app.py num processo novo."""
+    script = FIRST_RENDER_SCRIPT.format(app=str(ROOT / "app.py"))
+    result = _run_python(["-c", script])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help="orçamento em segundos para a primeira renderização")
+    parser.add_argument("--json", type=Path, help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    imports = {module: import_time(module) for module in MODULES}
+    print("Import (processo novo, cumulativo):")
+    for module, ms in sorted(imports.items(), key=lambda item: -(item[1] or 0)):
+        print(f"  {module:<22} {ms:>9.1f} ms" if ms is not None else f"  {module:<22}         -")
+
+    render = first_render()
+    print(f"Harness de teste:      {render['harness_s']:.2f} s")
+    print(f"Primeira renderização: {render['first_render_s']:.2f} s (orçamento {args.budget:.2f} s)")
+    print(f"Rerun com cache:       {render['warm_rerun_s']:.2f} s")
+    if render["exception"]:
+        print(f"Exceções no app: {render['exception']}")
+
+    within_budget = render["first_render_s"] <= args.budget and not render["exception"]
+    if args.json:
+        args.json.write_text(json.dumps({
+            "imports_ms": imports,
+            **render,
+            "budget_s": args.budget,
+            "within_budget": within_budget,
+        }, indent=2, ensure_ascii=False))
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,522 @@
+"""Teste de carga do dashboard: N sessões simultâneas num único `streamlit run`.
+
+Uso:
+    python benchmarks/loadtest.py [--sessions 10] [--duration 60] [--think 1.0]
+                                  [--port 8599] [--seed 0] [--json saida.json]
+                                  [--baseline anterior.json]
+
+O script sobe `streamlit run app.py` numa porta local e abre N conexões
+websocket como o navegador faz: cada sessão envia os estados dos widgets
+(BackMsg) e espera o fim do rerun (ForwardMsg script_finished). As sessões
+trocam de aba, mexem nos filtros da sidebar e usam as calculadoras das
+abas 4 e 7 (reruns só do fragmento), com pausas aleatórias entre as ações.
+
+O relatório traz p50/p95/p99 da latência dos reruns (geral e por ação),
+vazão em reruns/s e o RSS do servidor: base (após uma sessão de
+aquecimento, com os caches cheios), com as N sessões abertas e depois de
+fechá-las. Com --json o resultado é gravado para comparar versões; com
+--baseline as métricas principais são comparadas com um resultado anterior.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Abas do app (rótulos de SECTIONS em app.py)
+TABS = ["Visão Geral", "Público-Alvo", "Competitivo", "Produtos", "Finanças", "SWOT",
+        "Fornecedores"]
+REGIOES = ["Todas", "Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"]
+# Peso de cada ação no sorteio
+ACTIONS = {"aba": 0.35, "filtros": 0.25, "margem": 0.2, "importacao": 0.2}
+# Controles das calculadoras: rótulo -> (mínimo, máximo) sorteados
+MARGIN_INPUTS = {
+    "Preço de Custo (R$)": (10.0, 1000.0),
+    "Taxa de Importação (%)": (0, 100),
+    "Margem Desejada (%)": (10, 95),
+}
+IMPORT_INPUTS = {
+    "Valor do Produto (USD)": (1.0, 500.0),
+    "Taxa de Câmbio (R$/USD)": (1.0, 10.0),
+    "Imposto de Importação (%)": (0, 100),
+}
+# Tempo máximo (s) de espera por um rerun antes de contá-lo como erro
+RERUN_TIMEOUT = 120
+# Intervalo (s) entre as amostras de RSS do servidor
+RSS_INTERVAL = 0.5
+
+
+def rss_mb(pid):
+    """RSS atual (MB) do processo `pid`; None se não for possível medir."""
+    try:
+        import psutil
+    except ImportError:
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+        return None
+    try:
+        return psutil.Process(pid).memory_info().rss / 2**20
+    except psutil.Error:
+        return None
+
+
+class Server:
+    """`streamlit run app.py` num subprocesso, com o log em arquivo."""
+
+    def __init__(self, port, log_path):
+        self.port = port
+        self.log = open(log_path, "w")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", str(ROOT / "app.py"),
+             "--server.port", str(port), "--server.headless", "true",
+             "--browser.gatherUsageStats", "false"],
+            cwd=ROOT, stdout=self.log, stderr=subprocess.STDOUT)
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def wait_ready(self, timeout=60):
+        """Espera o health check responder; erro se o processo morrer antes."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"streamlit terminou com código {self.process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health",
+                                            timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise TimeoutError(f"streamlit não respondeu em {timeout}s")
+
+    def rss_mb(self):
+        return rss_mb(self.process.pid)
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+
+class Session:
+    """Uma sessão do navegador falando o protocolo do Streamlit pelo websocket.
+
+    Os widgets vistos nos deltas ficam indexados pelo rótulo (id, tipo e
+    fragmento); cada rerun envia o estado de todos os widgets alterados,
+    como o frontend faz.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets = {}
+        self.states = {}
+        self.page_script_hash = ""
+        self.tab = TABS[0]
+        self.exceptions = 0
+
+    def rerun(self, fragment_id=""):
+        """Pede um rerun (do app ou de um fragmento) e devolve a latência em segundos."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.page_script_hash = self.page_script_hash
+        client_state.fragment_id = fragment_id
+        client_state.widget_states.widgets.extend(self.states.values())
+        start = time.perf_counter()
+        self.ws.send(msg.SerializeToString())
+        self._wait_finished()
+        return time.perf_counter() - start
+
+    def _wait_finished(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        done = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(self.ws.recv(timeout=RERUN_TIMEOUT))
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = msg.new_session.page_script_hash
+            elif kind == "delta":
+                self._track(msg.delta)
+            elif kind == "script_finished":
+                if msg.script_finished in done:
+                    return
+                if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("erro de compilação no app")
+                # FINISHED_EARLY_FOR_RERUN: o rerun seguinte ainda vai terminar
+
+    def _track(self, delta):
+        """Registra widgets, o container das abas e exceções exibidas no app."""
+        if delta.WhichOneof("type") == "add_block":
+            block = delta.add_block
+            if block.WhichOneof("type") == "tab_container" and block.tab_container.id:
+                self.widgets["__abas__"] = ("tabs", block.tab_container.id, delta.fragment_id)
+            return
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.exceptions += 1
+        elif kind in ("multiselect", "slider", "selectbox", "number_input", "checkbox"):
+            widget = getattr(element, kind)
+            self.widgets[widget.label] = (kind, widget.id, delta.fragment_id)
+
+    def set(self, label, value):
+        """Altera o estado do widget `label`; devolve o fragmento dele ("" fora de fragmentos)."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        kind, widget_id, fragment_id = self.widgets[label]
+        state = WidgetState(id=widget_id)
+        if kind == "multiselect":
+            state.string_array_value.data.extend(value)
+        elif kind == "slider":
+            state.double_array_value.data.extend(value if isinstance(value, (list, tuple))
+                                                 else [value])
+        elif kind in ("selectbox", "tabs"):
+            state.string_value = value
+        elif kind == "number_input":
+            state.double_value = value
+        elif kind == "checkbox":
+            state.bool_value = value
+        self.states[widget_id] = state
+        return fragment_id
+
+
+@contextlib.contextmanager
+def open_session(url):
+    """Abre uma sessão no servidor; a conexão é fechada na saída do bloco."""
+    from websockets.sync.client import connect
+
+    with connect(url, subprotocols=["streamlit"], max_size=None,
+                 open_timeout=RERUN_TIMEOUT) as ws:
+        yield Session(ws)
+
+
+class VirtualUser:
+    """Roteiro de uma sessão: ações sorteadas com pausas, até o prazo."""
+
+    def __init__(self, url, seed, think):
+        self.url = url
+        self.rng = random.Random(seed)
+        self.think = think
+        self.samples = []  # (ação, latência em s)
+        self.errors = {}
+        self.finished = threading.Event()
+
+    def _error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def _measure(self, session, action, fragment_id=""):
+        exceptions = session.exceptions
+        self.samples.append((action, session.rerun(fragment_id)))
+        if session.exceptions > exceptions:
+            self._error("excecao_no_app")
+
+    def _open_tab(self, session, label):
+        session.tab = label
+        session.set("__abas__", label)
+        self._measure(session, "aba")
+
+    def _switch_tab(self, session):
+        self._open_tab(session, self.rng.choice([tab for tab in TABS if tab != session.tab]))
+
+    def _move_filters(self, session):
+        rng = self.rng
+        # Um terço das mudanças volta aos filtros padrão (servidos pelo snapshot, se houver)
+        if rng.random() < 1 / 3:
+            classes, ages, region = ["C", "D"], [25, 35], "Todas"
+        else:
+            classes = sorted(rng.sample(["C", "D", "E"], rng.randint(1, 3)))
+            ages = sorted(rng.sample(range(25, 46), 2))
+            region = rng.choice(REGIOES)
+        session.set("Classe Social", classes)
+        session.set("Faixa Etária", ages)
+        session.set("Região", region)
+        self._measure(session, "filtros")
+
+    def _use_calculator(self, session, action, tab, inputs):
+        if session.tab != tab:
+            self._open_tab(session, tab)
+        label = self.rng.choice(list(inputs))
+        low, high = inputs[label]
+        if isinstance(low, float):
+            value = round(self.rng.uniform(low, high), 2)
+        else:
+            value = self.rng.randint(low, high)
+        fragment_id = session.set(label, value)
+        self._measure(session, action, fragment_id)
+
+    def run(self, deadline, start_event, release):
+        """Executa ações até `deadline`; a sessão só fecha quando `release` for sinalizado."""
+        start_event.wait()
+        try:
+            with open_session(self.url) as session:
+                try:
+                    self._act(session, deadline)
+                finally:
+                    # Sessão aberta até a medição do RSS com as N sessões ativas
+                    self.finished.set()
+                    release.wait()
+        except TimeoutError:
+            self._error("timeout")
+        except Exception as error:
+            self._error(f"sessao:{type(error).__name__}")
+        finally:
+            self.finished.set()
+
+    def _act(self, session, deadline):
+        actions, weights = list(ACTIONS), list(ACTIONS.values())
+        self._measure(session, "inicial")
+        while time.monotonic() < deadline:
+            time.sleep(self.rng.expovariate(1 / self.think) if self.think > 0 else 0)
+            if time.monotonic() >= deadline:
+                break
+            action = self.rng.choices(actions, weights)[0]
+            try:
+                if action == "aba":
+                    self._switch_tab(session)
+                elif action == "filtros":
+                    self._move_filters(session)
+                elif action == "margem":
+                    self._use_calculator(session, action, "Produtos", MARGIN_INPUTS)
+                else:
+                    self._use_calculator(session, action, "Fornecedores", IMPORT_INPUTS)
+            except KeyError as error:
+                self._error(f"widget_ausente:{error.args[0]}")
+
+
+def warm_up(url):
+    """Sessão única que passa por todas as abas e calculadoras (enche os caches)."""
+    user = VirtualUser(url, seed=-1, think=0)
+    with open_session(url) as session:
+        user._measure(session, "inicial")
+        for tab in TABS[1:]:
+            user._open_tab(session, tab)
+        user._use_calculator(session, "importacao", "Fornecedores", IMPORT_INPUTS)
+        user._use_calculator(session, "margem", "Produtos", MARGIN_INPUTS)
+        user._open_tab(session, TABS[0])
+    return user
+
+
+def settled_rss(server, samples=5):
+    """Mediana de algumas leituras de RSS (o alocador oscila alguns MB entre leituras)."""
+    readings = []
+    for _ in range(samples):
+        time.sleep(RSS_INTERVAL)
+        rss = server.rss_mb()
+        if rss is not None:
+            readings.append(rss)
+    return float(np.median(readings)) if readings else None
+
+
+def percentiles(latencies):
+    """p50/p95/p99, média e máximo (ms) de uma lista de latências em segundos."""
+    if not latencies:
+        return {"count": 0}
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": len(values), "p50_ms": float(p50), "p95_ms": float(p95),
+            "p99_ms": float(p99), "mean_ms": float(values.mean()), "max_ms": float(values.max())}
+
+
+def run_load(server, sessions, duration, think, seed):
+    """Roda as N sessões contra o servidor e devolve o relatório (dict)."""
+    warm = warm_up(server.url)
+    if warm.errors:
+        raise RuntimeError(f"aquecimento falhou: {warm.errors}")
+    rss_baseline = settled_rss(server)
+
+    rss_samples = []
+    sampling = threading.Event()
+
+    def sample_rss():
+        while not sampling.wait(RSS_INTERVAL):
+            rss = server.rss_mb()
+            if rss is not None:
+                rss_samples.append(rss)
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+
+    # Todas as sessões começam juntas e param no mesmo prazo
+    start_event, release = threading.Event(), threading.Event()
+    deadline = time.monotonic() + duration
+    users = [VirtualUser(server.url, seed * 100_003 + index, think) for index in range(sessions)]
+    threads = [threading.Thread(target=user.run, args=(deadline, start_event, release),
+                                daemon=True)
+               for user in users]
+    for thread in threads:
+        thread.start()
+    started = time.monotonic()
+    start_event.set()
+    for user in users:
+        user.finished.wait()
+    elapsed = time.monotonic() - started
+    rss_loaded = settled_rss(server)
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    rss_released = settled_rss(server)
+    sampling.set()
+    sampler.join()
+
+    samples = [sample for user in users for sample in user.samples]
+    errors = {}
+    for user in users:
+        for kind, count in user.errors.items():
+            errors[kind] = errors.get(kind, 0) + count
+    reruns = [latency for action, latency in samples if action != "inicial"]
+    by_action = {action: percentiles([latency for name, latency in samples if name == action])
+                 for action in ["inicial", *ACTIONS]}
+
+    def per_session(rss):
+        if rss is None or rss_baseline is None:
+            return None
+        return (rss - rss_baseline) / sessions
+
+    return {
+        "sessions": sessions,
+        "duration_s": elapsed,
+        "think_s": think,
+        "seed": seed,
+        "reruns": len(reruns),
+        "errors": errors,
+        "throughput_rps": len(reruns) / elapsed if elapsed else 0.0,
+        "latency": percentiles(reruns),
+        "actions": by_action,
+        "rss_mb": {
+            "baseline": rss_baseline,
+            "loaded": rss_loaded,
+            "peak": max(rss_samples, default=rss_loaded),
+            "released": rss_released,
+            "per_session": per_session(rss_loaded),
+            "retained_per_session": per_session(rss_released),
+        },
+    }
+
+
+# Métricas comparadas com --baseline: (caminho no relatório, rótulo, menor é melhor)
+COMPARED = [
+    (("latency", "p50_ms"), "latência p50 (ms)", True),
+    (("latency", "p95_ms"), "latência p95 (ms)", True),
+    (("latency", "p99_ms"), "latência p99 (ms)", True),
+    (("throughput_rps",), "vazão (reruns/s)", False),
+    (("rss_mb", "per_session"), "RSS por sessão (MB)", True),
+]
+
+
+def _lookup(report, path):
+    for key in path:
+        report = (report or {}).get(key)
+    return report
+
+
+def git_commit():
+    """Commit atual do repositório (None fora de um checkout git)."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10, help="sessões simultâneas")
+    parser.add_argument("--duration", type=float, default=60.0,
+                        help="duração do teste em segundos")
+    parser.add_argument("--think", type=float, default=1.0,
+                        help="pausa média (s) entre as ações de cada sessão")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="grava o resultado em JSON")
+    parser.add_argument("--baseline", type=Path,
+                        help="resultado JSON anterior para comparar")
+    args = parser.parse_args()
+
+    import streamlit
+
+    log_path = Path(os.environ.get("TMPDIR", "/tmp")) / f"pobishop-loadtest-{args.port}.log"
+    server = Server(args.port, log_path)
+    try:
+        server.wait_ready()
+        result = run_load(server, args.sessions, args.duration, args.think, args.seed)
+    finally:
+        server.stop()
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "streamlit": streamlit.__version__,
+        "commit": git_commit(),
+        **result,
+    }
+
+    latency, rss = report["latency"], report["rss_mb"]
+    print(f"{args.sessions} sessões por {report['duration_s']:.0f}s: {report['reruns']} reruns, "
+          f"{report['throughput_rps']:.1f} reruns/s")
+    if latency["count"]:
+        print(f"Latência: p50 {latency['p50_ms']:.0f}ms  p95 {latency['p95_ms']:.0f}ms  "
+              f"p99 {latency['p99_ms']:.0f}ms  máx {latency['max_ms']:.0f}ms")
+    print(f"{'ação':<12} {'reruns':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for action, stats in report["actions"].items():
+        if stats["count"]:
+            print(f"{action:<12} {stats['count']:>7} {stats['p50_ms']:>7.0f}ms "
+                  f"{stats['p95_ms']:>7.0f}ms {stats['p99_ms']:>7.0f}ms")
+    if rss["baseline"] is not None:
+        print(f"RSS: base {rss['baseline']:.0f} MB, com as sessões {rss['loaded']:.0f} MB "
+              f"(pico {rss['peak']:.0f} MB), após fechar {rss['released']:.0f} MB; "
+              f"{rss['per_session']:.1f} MB por sessão")
+    for kind, count in report["errors"].items():
+        print(f"ERRO {kind}: {count}")
+
+    if args.baseline:
+        previous = json.loads(args.baseline.read_text())
+        print(f"Comparação com {args.baseline} (commit {previous.get('commit') or '-'}):")
+        changed = [key for key in ("sessions", "think_s", "seed")
+                   if previous.get(key) != report[key]]
+        if changed:
+            print(f"  AVISO: parâmetros diferentes do resultado anterior ({', '.join(changed)})")
+        for path, label, lower_is_better in COMPARED:
+            before, after = _lookup(previous, path), _lookup(report, path)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else 0.0
+            worse = change > 0 if lower_is_better else change < 0
+            flag = "  pior" if worse and abs(change) > 0.1 else ""
+            print(f"  {label:<22} {before:>10.1f} -> {after:>10.1f} ({change:+.0%}){flag}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""Suíte de benchmarks dos loaders, dos construtores de figuras e do app completo.
+
+Uso:
+    python benchmarks/suite.py [--scales 1,100,10000] [--repeat 5]
+                               [--baseline benchmarks/baseline.json]
+                               [--update-baseline] [--tolerance 0.25]
+                               [--only loaders,figures,filters,personas,app]
+
+Cada caso é medido sem cache (mediana de --repeat execuções) e uma vez sob
+tracemalloc para o pico de memória. O resultado é comparado com o baseline
+salvo; o script termina com código 1 se algum caso regredir além da
+tolerância.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import data_loader  # noqa: E402
+import visualizations as viz  # noqa: E402
+from cache import clear_caches, figure_cache  # noqa: E402
+from datasets import registry  # noqa: E402
+from ingest import to_table, write_dataset  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_SCALES = (1, 100, 10_000)
+# Diferenças abaixo deste valor são ruído, mesmo que passem da tolerância
+NOISE_FLOOR_S = 0.002
+# Limite de linhas da base de clientes sintética nas escalas maiores
+MAX_CUSTOMER_ROWS = 5_000_000
+
+# Datasets lidos por cada loader (nome no diretório colunar)
+LOADER_DATASETS = {
+    "load_market_overview_data": ["regioes", "crescimento"],
+    "load_target_audience_data": ["demografia", "renda", "comportamento"],
+    "load_competitive_data": ["concorrentes"],
+    "load_products_data": ["produtos"],
+    "load_financial_data": ["receita", "investimento"],
+    "load_swot_data": ["riscos"],
+    "load_supplier_data": ["fornecedores"],
+}
+
+
+def scale_frame(df, factor, seed=0):
+    """Replica as linhas `factor` vezes com ruído nos números.
+
+    Colunas de texto com valores únicos (identificadores como Produto ou
+    Concorrente) ganham um sufixo para continuar únicas; as demais
+    (categorias como Origem) são mantidas.
+    """
+    if factor == 1:
+        return df.copy()
+    rng = np.random.default_rng(seed)
+    scaled = df.loc[df.index.repeat(factor)].reset_index(drop=True)
+    copy_id = np.tile(np.arange(factor), len(df))
+    for column in df.columns:
+        values = scaled[column]
+        if pd.api.types.is_numeric_dtype(values):
+            noise = rng.normal(1, 0.05, len(scaled))
+            scaled[column] = (values.to_numpy(dtype=np.float64) * noise).astype(values.dtype)
+        elif df[column].is_unique:
+            scaled[column] = values.astype(str) + "#" + copy_id.astype(str)
+    return scaled
+
+
+def measure(func, repeat):
+    """Mediana do tempo de `repeat` execuções e pico de memória (MB)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "peak_mb": peak / (1024 * 1024),
+    }
+
+
+def _base_datasets():
+    """Datasets na escala 1x, como os loaders os entregam hoje."""
+    df_geo, df_growth, _ = data_loader.load_market_overview_data.func()
+    df_demo, df_income, df_behavior, _ = data_loader.load_target_audience_data.func()
+    df_revenue, df_investment = data_loader.load_financial_data.func()
+    _, df_risk = data_loader.load_swot_data.func()
+    return {
+        "regioes": df_geo,
+        "crescimento": df_growth,
+        "demografia": df_demo,
+        "renda": df_income,
+        "comportamento": df_behavior,
+        "concorrentes": data_loader.load_competitive_data.func(),
+        "produtos": data_loader.load_products_data.func(),
+        "receita": df_revenue,
+        "investimento": df_investment,
+        "riscos": df_risk,
+        "fornecedores": data_loader.load_supplier_data.func(),
+    }
+
+
+def bench_loaders(base, scales, repeat):
+    """Mede cada load_* lendo datasets colunares escalados."""
+    results = {}
+    original_dir = data_loader.DATA_DIR
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_loader.DATA_DIR = Path(tmp)
+            for name, df in base.items():
+                write_dataset(to_table(scale_frame(df, scale)), Path(tmp), name)
+            try:
+                # O registro de datasets é limpo a cada execução para medir a leitura
+                for loader_name in LOADER_DATASETS:
+                    loader = getattr(data_loader, loader_name)
+                    results[f"{loader_name}[{scale}x]"] = measure(
+                        lambda: (registry.clear(), loader.func()), repeat)
+                n_rows = min(200_000 * scale, MAX_CUSTOMER_ROWS)
+                results[f"load_customer_data[{scale}x]"] = measure(
+                    lambda: (registry.clear(), data_loader.load_customer_data.func(n_rows=n_rows)),
+                    repeat)
+            finally:
+                data_loader.DATA_DIR = original_dir
+    return results
+
+
+def _builder_inputs(base):
+    """Pares (construtor, dataset) com a entrada de cada create_*."""
+    from pricing import product_costs, rate_range, sensitivity_summary
+
+    df_grid = sensitivity_summary(product_costs(base["produtos"]),
+                                  rate_range(0, 100, 1.0), rate_range(10, 90, 1.0))["media"]
+    return [
+        (viz.create_region_map, base["regioes"]),
+        (viz.create_growth_chart, base["crescimento"]),
+        (viz.create_age_pyramid, base["demografia"]),
+        (viz.create_income_chart, base["renda"]),
+        (viz.create_behavior_radar, base["comportamento"]),
+        (viz.create_competitor_map, base["concorrentes"]),
+        (viz.create_market_share, base["concorrentes"]),
+        (viz.create_product_treemap, base["produtos"]),
+        (viz.create_price_demand, base["produtos"]),
+        (viz.create_revenue_chart, base["receita"]),
+        (viz.create_investment_chart, base["investimento"]),
+        (viz.create_risk_heatmap, base["riscos"]),
+        (viz.create_supplier_chart, base["fornecedores"]),
+        (viz.create_product_flow, base["fornecedores"]),
+        (viz.create_margin_heatmap, df_grid),
+    ]
+
+
+def bench_figures(base, scales, repeat):
+    """Mede cada create_* sem cache e, se memoizado, com acerto no cache de figuras."""
+    results = {}
+    for builder, df in _builder_inputs(base):
+        name = builder.__name__
+        build = getattr(builder, "__wrapped__", None)
+        for scale in scales:
+            df_scaled = scale_frame(df, scale)
+            if build is None:
+                results[f"{name}[{scale}x]"] = measure(lambda: builder(df_scaled), repeat)
+                continue
+            results[f"{name}[{scale}x]"] = measure(lambda: build(df_scaled), repeat)
+            builder(df_scaled)
+            results[f"{name}[{scale}x,cache]"] = measure(lambda: builder(df_scaled), repeat)
+            figure_cache.clear()
+    return results
+
+
+# Combinações de filtros da sidebar medidas em bench_filters
+FILTER_CASES = {
+    "todos": ([], (25, 45), "Todas"),
+    "C+D, 28-40, Sul": (["C", "D"], (28, 40), "Sul"),
+    "E, 30-30, Norte": (["E"], (30, 30), "Norte"),
+}
+
+
+def filter_records(df, classe_social, faixa_etaria, regiao):
+    """Referência sem cubo: máscara booleana e groupby sobre os registros."""
+    mask = df["Idade"].between(*faixa_etaria)
+    if classe_social:
+        mask &= df["Classe"].isin(classe_social)
+    if regiao != "Todas":
+        mask &= df["Regiao"] == regiao
+    selected = df[mask]
+    return (selected.groupby(["Idade", "Sexo"], observed=True).size(),
+            selected.groupby("Classe", observed=True)["Renda"].mean(),
+            selected.groupby("Regiao", observed=True).size())
+
+
+def bench_filters(scales, repeat):
+    """Mede a troca de filtro: recorte do cubo x filtro sobre os registros."""
+    from filters import AudienceCube
+
+    results = {}
+    for scale in scales:
+        n_rows = min(200_000 * scale, MAX_CUSTOMER_ROWS)
+        df = data_loader.load_customer_data.func(n_rows=n_rows)
+        cube = AudienceCube(df)
+        for name, args in FILTER_CASES.items():
+            results[f"cubo[{name},{n_rows}]"] = measure(lambda: cube.summarize(*args), repeat)
+            results[f"registros[{name},{n_rows}]"] = measure(
+                lambda: filter_records(df, *args), repeat)
+        registry.clear()
+    return results
+
+
+# Linhas da referência registro a registro (DataFrame.apply) em bench_personas
+APPLY_ROWS = 10_000
+
+
+def bench_personas(scales, repeat):
+    """Mede a atribuição de personas em lotes e, numa amostra, a versão com apply."""
+    from personas import AGE_SCALE, CLASS_SCALE, CLASSES, SCORE_SCALE, PersonaAssignment
+
+    personas = data_loader.PERSONAS
+    results = {}
+    for scale in scales:
+        n_rows = min(200_000 * scale, MAX_CUSTOMER_ROWS)
+        df = data_loader.load_customer_data.func(n_rows=n_rows)
+        results[f"personas[lotes,{n_rows}]"] = measure(lambda: PersonaAssignment(df, personas),
+                                                       repeat)
+        registry.clear()
+
+    centroids = np.array([[p["Idade"] / AGE_SCALE, CLASSES.index(p["Classe"]) / CLASS_SCALE,
+                           *(np.array(p["Comportamento"]) / SCORE_SCALE)] for p in personas])
+
+    def nearest(row):
+        features = np.array([row["Idade"] / AGE_SCALE, CLASSES.index(row["Classe"]) / CLASS_SCALE,
+                             *(row[column] / SCORE_SCALE for column in data_loader.BEHAVIOR)])
+        return int(((centroids - features) ** 2).sum(axis=1).argmin())
+
+    df = data_loader.load_customer_data.func(n_rows=APPLY_ROWS)
+    results[f"personas[apply,{APPLY_ROWS}]"] = measure(lambda: df.apply(nearest, axis=1), 1)
+    registry.clear()
+    return results
+
+
+def bench_app(repeat):
+    """Mede reruns completos de app.py com o harness de testes do Streamlit."""
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=300)
+    clear_caches()
+    figure_cache.clear()
+    registry.clear()
+    results["app[primeira execucao]"] = measure(lambda: at.run(), 1)
+
+    for section in ["Visão Geral", "Público-Alvo", "Competitivo", "Produtos",
+                    "Finanças", "SWOT", "Fornecedores"]:
+        at.session_state["secao"] = section
+        results[f"app[rerun {section}]"] = measure(lambda: at.run(), repeat)
+
+    at.session_state["secao"] = "Visão Geral"
+    at.toggle[0].set_value(False)
+    results["app[rerun todas as abas]"] = measure(lambda: at.run(), repeat)
+    if at.exception:
+        raise RuntimeError(f"app.py falhou: {[e.value for e in at.exception]}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Lista os casos cujo tempo piorou além da tolerância."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        limit = previous["median_s"] * (1 + tolerance)
+        if current["median_s"] > limit and current["median_s"] - previous["median_s"] > NOISE_FLOOR_S:
+            regressions.append((name, previous["median_s"], current["median_s"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="fatores de escala separados por vírgula")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", default="loaders,figures,filters,personas,app",
+                        help="grupos a executar: loaders, figures, filters, personas, app")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="salva este resultado como novo baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="piora relativa aceita antes de acusar regressão")
+    parser.add_argument("--json", type=Path, help="grava o resultado completo em JSON")
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    groups = set(args.only.split(","))
+    base = _base_datasets()
+
+    results = {}
+    if "loaders" in groups:
+        results.update(bench_loaders(base, scales, args.repeat))
+    if "figures" in groups:
+        results.update(bench_figures(base, scales, args.repeat))
+    if "filters" in groups:
+        results.update(bench_filters(scales, args.repeat))
+    if "personas" in groups:
+        results.update(bench_personas(scales, args.repeat))
+    if "app" in groups:
+        results.update(bench_app(args.repeat))
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["results"]
+
+    print(f"{'caso':<52} {'mediana':>10} {'baseline':>10} {'pico MB':>9}")
+    for name, result in results.items():
+        previous = baseline.get(name, {}).get("median_s")
+        previous = f"{previous * 1000:>8.1f}ms" if previous is not None else f"{'-':>10}"
+        print(f"{name:<52} {result['median_s'] * 1000:>8.1f}ms {previous} {result['peak_mb']:>9.1f}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, before, after in regressions:
+        print(f"REGRESSÃO {name}: {before * 1000:.1f}ms -> {after * 1000:.1f}ms")
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scales": scales,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"Baseline salvo em {args.baseline}")
+    elif not baseline:
+        print("Sem baseline; rode com --update-baseline para criar um.")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
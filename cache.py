@@ -0,0 +1,296 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import update_wrapper
+
+import numpy as np
+import pandas as pd
+
+from profiling import record
+
+# Registro de todos os loaders cacheados (nome -> CachedLoader)
+_loaders = {}
+
+
+def _file_fingerprint(path, use_hash=False):
+    """Retorna a assinatura de um arquivo de origem (mtime/tamanho ou hash)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if not use_hash:
+        return (stat.st_mtime_ns, stat.st_size)
+    digest = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def share(value):
+    """Entrega um valor em cache sem copiar dados.
+
+    DataFrames viram cópias rasas (o copy-on-write do pandas isola alterações
+    de uma sessão) e tuplas, listas e dicts são recriados com os itens
+    compartilhados.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(share(item) for item in value)
+    if isinstance(value, list):
+        return [share(item) for item in value]
+    if isinstance(value, dict):
+        return {key: share(item) for key, item in value.items()}
+    return value
+
+
+class CachedLoader:
+    """Envolve uma função load_* com cache por TTL e invalidação por origem.
+
+    Com `max_entries`, guarda no máximo essa quantidade de chaves e descarta
+    as usadas há mais tempo (para funções chamadas com parâmetros livres).
+    """
+
+    def __init__(self, func, ttl=None, sources=(), use_hash=False, max_entries=None):
+        self.func = func
+        self.name = func.__name__
+        self.ttl = ttl
+        self.sources = sources
+        self.use_hash = use_hash
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        update_wrapper(self, func)
+
+    def _source_paths(self):
+        # As origens podem ser fixas ou calculadas (ex.: arquivos criados depois)
+        sources = self.sources() if callable(self.sources) else self.sources
+        return [os.fspath(path) for path in sources]
+
+    def fingerprint(self):
+        """Assinatura atual das origens de dados do loader."""
+        return tuple(
+            (path, _file_fingerprint(path, self.use_hash))
+            for path in self._source_paths()
+        )
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        key = (args, tuple(sorted(kwargs.items())))
+        fingerprint = self.fingerprint()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at, stored_fingerprint = entry
+                if stored_fingerprint != fingerprint:
+                    self.invalidations += 1
+                elif self.ttl is not None and now - stored_at >= self.ttl:
+                    self.expirations += 1
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    record("dados", self.name, time.perf_counter() - start, cached=True)
+                    return share(value)
+            self.misses += 1
+
+        # Executa fora do lock para não serializar loaders lentos
+        value = self.func(*args, **kwargs)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic(), fingerprint)
+            self._entries.move_to_end(key)
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        record("dados", self.name, time.perf_counter() - start, cached=False)
+        return share(value)
+
+    def clear(self):
+        """Descarta todas as entradas em cache deste loader."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Retorna os contadores de uso do cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+            }
+
+
+def cached_loader(ttl=None, sources=(), use_hash=False, max_entries=None):
+    """Decorador que adiciona cache com TTL e invalidação por arquivo de origem.
+
+    `sources` pode ser uma lista de caminhos ou uma função que a retorna;
+    `max_entries` limita as chaves guardadas (LRU).
+    Os valores em cache são compartilhados entre sessões e devem ser
+    tratados como somente leitura.
+    """
+    def decorator(func):
+        loader = CachedLoader(func, ttl=ttl, sources=sources, use_hash=use_hash,
+                              max_entries=max_entries)
+        _loaders[loader.name] = loader
+        return loader
+    return decorator
+
+
+def source_files():
+    """Arquivos de origem de todos os loaders cacheados, sem repetição."""
+    return sorted({path for loader in _loaders.values() for path in loader._source_paths()})
+
+
+def cache_stats():
+    """Retorna os contadores de hit/miss de todos os loaders cacheados."""
+    return {name: loader.stats() for name, loader in _loaders.items()}
+
+
+def clear_caches():
+    """Limpa o cache de todos os loaders."""
+    for loader in _loaders.values():
+        loader.clear()
+
+
+def _hash_column(digest, values):
+    """Alimenta o digest com uma coluna (Series ou Index) pelo caminho mais barato."""
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        digest.update(np.ascontiguousarray(values.codes if isinstance(values, pd.Index) else values.cat.codes).tobytes())
+        _hash_column(digest, dtype.categories)
+    elif isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        digest.update(np.ascontiguousarray(values.to_numpy()).tobytes())
+    else:
+        # Texto: concatenar é bem mais rápido que hash_pandas_object; os
+        # comprimentos entram junto para que ["a\x1fb"] e ["a", "b"] não colidam
+        items = values.tolist()
+        try:
+            digest.update("\x1f".join(items).encode("utf-8", "surrogatepass"))
+            digest.update(np.fromiter(map(len, items), dtype=np.int64, count=len(items)).tobytes())
+        except TypeError:
+            # Nulos ou objetos não textuais
+            digest.update(pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy().tobytes())
+
+
+def _hash_value(digest, value):
+    """Alimenta o digest com o conteúdo de um argumento."""
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr(list(zip(value.columns, value.dtypes.astype(str)))).encode())
+        digest.update(f"{value.shape}".encode())
+        try:
+            _hash_index(digest, value.index)
+            for _, column in value.items():
+                _hash_column(digest, column)
+        except TypeError:
+            # Células não hasheáveis (listas, dicts): usa a serialização
+            digest.update(value.to_json().encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(f"{value.dtype}{len(value)}".encode())
+        _hash_index(digest, value.index)
+        _hash_column(digest, value)
+    else:
+        digest.update(repr(value).encode())
+
+
+def _hash_index(digest, index):
+    if isinstance(index, pd.RangeIndex):
+        digest.update(repr(index).encode())
+    else:
+        _hash_column(digest, index)
+
+
+def content_hash(*args, **kwargs):
+    """Gera uma chave pelo conteúdo dos argumentos (DataFrames inclusive).
+
+    Cada argumento entra com a posição (ou o nome) e o tipo, seguidos do
+    digest de tamanho fixo do seu conteúdo; assim (1, 23) e (12, 3) não
+    colidem.
+    """
+    digest = hashlib.sha1()
+    items = [(str(position), value) for position, value in enumerate(args)]
+    items += [("=" + name, value) for name, value in sorted(kwargs.items())]
+    for name, value in items:
+        part = hashlib.sha1()
+        _hash_value(part, value)
+        kind = type(value)
+        digest.update(f"{name}:{kind.__module__}.{kind.__qualname__}:".encode())
+        digest.update(part.digest())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """Cache LRU de figuras serializadas em JSON, limitado por tamanho em MB."""
+
+    def __init__(self, max_mb=64):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna o JSON em cache (ou None) e marca a entrada como recente."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        """Armazena o JSON de uma figura, descartando as menos usadas."""
+        nbytes = len(payload)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = payload
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Descarta todas as figuras em cache."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Retorna os contadores e a ocupação do cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_mb": self.size / (1024 * 1024),
+                "max_mb": self.max_bytes / (1024 * 1024),
+            }
+
+
+# Cache de figuras compartilhado pelo processo (tamanho via variável de ambiente)
+figure_cache = FigureCache(max_mb=float(os.environ.get("POBISHOP_FIGURE_CACHE_MB", 64)))
@@ -1,17 +1,112 @@
+import logging
+import os
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 
+from cache import cached_loader
+from datasets import registry
+from leadtime import DELIVERY_LOG, lead_time_summary
+from sales import SALES_LOG, sales_kpis
+
+logger = logging.getLogger(__name__)
+
+# Diretório com os datasets colunares gerados por ingest.py
+DATA_DIR = Path(os.environ.get("POBISHOP_DATA_DIR", Path(__file__).parent / "data" / "columnar"))
+
+
+def _sources(*datasets, logs=()):
+    """Origens de um loader: este módulo, os datasets que ele lê e os logs de eventos.
+
+    Retorna a função usada em cached_loader(sources=...): só o que o loader
+    lê invalida seu cache (um append no log de vendas não refaz o catálogo).
+    """
+    def sources():
+        return [__file__, *(DATA_DIR / f"{name}.arrow" for name in datasets), *logs]
+    return sources
+
+
+def read_dataset(name, columns=None):
+    """Lê um dataset colunar mapeado em memória, apenas com as colunas pedidas.
+
+    Colunas pedidas que o arquivo não tem são ignoradas. Retorna None se o
+    dataset ainda não foi ingerido.
+    """
+    path = DATA_DIR / f"{name}.arrow"
+    if not path.exists():
+        return None
+    from pyarrow import feather
+    # Sem compressão (ver ingest.py) o mapeamento não lê as colunas descartadas
+    table = feather.read_table(path, memory_map=True)
+    if columns is not None:
+        table = table.select([column for column in columns if column in table.column_names])
+    return table.to_pandas()
+
+
+def _version(name):
+    """Assinatura do arquivo ingerido (None se o dataset não existe)."""
+    path = DATA_DIR / f"{name}.arrow"
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _dataset(name, fallback):
+    """Dataset compartilhado: o ingerido (com as colunas do fallback) ou os dados embutidos."""
+    def build():
+        df = read_dataset(name, columns=list(fallback))
+        if df is not None:
+            missing = [column for column in fallback if column not in df.columns]
+            if missing:
+                logger.warning("Dataset %s sem as colunas %s; usando os dados embutidos",
+                               name, ", ".join(missing))
+                df = None
+        return pd.DataFrame(fallback) if df is None else df
+    return registry.get(name, build, version=_version(name))
+
+# Atributos de comportamento da base de clientes (coluna -> categoria do radar)
+BEHAVIOR = {
+    "Organizacao": "Organização Doméstica",
+    "Economia": "Economia de Recursos",
+    "Mobilidade": "Mobilidade",
+    "Conectividade": "Conectividade",
+    "Qualidade": "Qualidade",
+}
+
+# Personas: idade, classe e pontuação em cada atributo de BEHAVIOR
+PERSONAS = [
+    {"Nome": "Leozito", "Idade": 28, "Ocupacao": "Auxiliar de cozinha", "Classe": "D",
+     "Descricao": "Valoriza praticidade e economia.",
+     "Comportamento": [70, 90, 50, 45, 55]},
+    {"Nome": "Juju", "Idade": 32, "Ocupacao": "Administrativa", "Classe": "C",
+     "Descricao": "Focada em orçamento e organização.",
+     "Comportamento": [95, 80, 40, 50, 60]},
+    {"Nome": "Enzo", "Idade": 25, "Ocupacao": "Entregador", "Classe": "E",
+     "Descricao": "Busca produtos duráveis para mobilidade.",
+     "Comportamento": [45, 60, 95, 60, 80]},
+    {"Nome": "Val", "Idade": 33, "Ocupacao": "Vendedora", "Classe": "D",
+     "Descricao": "Procura itens multifuncionais.",
+     "Comportamento": [80, 70, 65, 55, 65]},
+    {"Nome": "Tulinho", "Idade": 30, "Ocupacao": "Técnico de informática", "Classe": "C",
+     "Descricao": "Valoriza tecnologia com custo acessível.",
+     "Comportamento": [50, 65, 55, 95, 70]},
+]
+
+@cached_loader(ttl=15 * 60, sources=_sources("regioes", "crescimento", logs=[SALES_LOG]))
 def load_market_overview_data():
     """Carrega dados para visão geral do mercado."""
     # Dados geográficos
     regions = ["Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"]
-    df_geo = pd.DataFrame({
+    df_geo = _dataset("regioes", {
         "Regiao": regions,
         "Publico": [5000, 15000, 7000, 30000, 10000]
     })
     
     # Projeção de crescimento
-    df_growth = pd.DataFrame({
+    df_growth = _dataset("crescimento", {
         "Ano": [2024, 2025, 2026],
         "Faturamento": [200, 235, 260]  # Valores em bilhões
     })
@@ -24,50 +119,43 @@ def load_market_overview_data():
         "Inflação": "5.06%",
         "Taxa Selic": "15%"
     }
+    # Mercado, crescimento e ticket vêm do log de pedidos quando ele existe
+    kpis.update(sales_kpis() or {})
     
     return df_geo, df_growth, kpis
 
+@cached_loader(ttl=60 * 60, sources=_sources("demografia", "renda", "comportamento"))
 def load_target_audience_data():
     """Carrega dados do público-alvo."""
     # Dados demográficos
-    df_demo = pd.DataFrame({
+    df_demo = _dataset("demografia", {
         "Faixa_Etaria": ["25-30", "31-35", "36-40", "41-45"],
         "Masculino": [40, 35, 30, 25],
         "Feminino": [38, 32, 28, 20]
     })
     
     # Renda média por classe
-    df_income = pd.DataFrame({
+    df_income = _dataset("renda", {
         "Classe": ["C", "D", "E"],
         "Renda_Media": [3500, 2500, 1500]
     })
     
     # Perfil de comportamento
-    df_behavior = pd.DataFrame({
+    df_behavior = _dataset("comportamento", {
         "Categoria": ["Organização Doméstica", "Economia de Recursos", 
                      "Mobilidade", "Conectividade", "Qualidade"],
         "Pontuacao": [80, 70, 60, 50, 65]
     })
     
     # Dados das personas
-    personas = [
-        {"Nome": "Leozito", "Idade": 28, "Ocupacao": "Auxiliar de cozinha", 
-         "Descricao": "Valoriza praticidade e economia."},
-        {"Nome": "Juju", "Idade": 32, "Ocupacao": "Administrativa", 
-         "Descricao": "Focada em orçamento e organização."},
-        {"Nome": "Enzo", "Idade": 25, "Ocupacao": "Entregador", 
-         "Descricao": "Busca produtos duráveis para mobilidade."},
-        {"Nome": "Val", "Idade": 33, "Ocupacao": "Vendedora", 
-         "Descricao": "Procura itens multifuncionais."},
-        {"Nome": "Tulinho", "Idade": 30, "Ocupacao": "Técnico de informática", 
-         "Descricao": "Valoriza tecnologia com custo acessível."}
-    ]
+    personas = [dict(persona) for persona in PERSONAS]
     
     return df_demo, df_income, df_behavior, personas
 
+@cached_loader(ttl=60 * 60, sources=_sources("concorrentes"))
 def load_competitive_data():
     """Carrega dados da análise competitiva."""
-    df_competitors = pd.DataFrame({
+    df_competitors = _dataset("concorrentes", {
         "Concorrente": ["Shopee", "AliExpress", "Shein", "Mercado Livre", 
                        "Americanas", "Utilidomésticos"],
         "Preco": [30, 25, 35, 40, 38, 28],
@@ -77,26 +165,66 @@ def load_competitive_data():
     
     return df_competitors
 
+@cached_loader(ttl=60 * 60, sources=_sources("catalogo_concorrentes"))
+def load_competitor_catalog(n_skus=300_000, seed=7):
+    """Carrega o catálogo de SKUs dos concorrentes (preço, qualidade e categoria).
+
+    Sem o dataset "catalogo_concorrentes" ingerido, gera um catálogo
+    sintético coerente com o preço e a qualidade relativos de cada concorrente.
+    """
+    return registry.get("catalogo_concorrentes", lambda: _catalog_frame(n_skus, seed),
+                        version=(_version("catalogo_concorrentes"), n_skus, seed))
+
+
+def _catalog_frame(n_skus, seed):
+    """Lê o dataset "catalogo_concorrentes" ou gera o catálogo sintético."""
+    df_catalog = read_dataset("catalogo_concorrentes")
+    if df_catalog is not None:
+        return df_catalog
+    
+    df_competitors = load_competitive_data()
+    rng = np.random.default_rng(seed)
+    # Preço base por categoria (R$) e índice de preço relativo de cada concorrente
+    categories = {"Utilidade": 42.0, "Eletrônico": 60.0, "Casa": 55.0, "Moda": 70.0, "Beleza": 35.0}
+    share = df_competitors["Market_Share"].to_numpy(dtype=np.float64)
+    competitor = rng.choice(len(df_competitors), size=n_skus, p=share / share.sum())
+    category = rng.integers(0, len(categories), size=n_skus)
+    price_index = df_competitors["Preco"].to_numpy(dtype=np.float64)
+    price_index = price_index / price_index.mean()
+    quality = df_competitors["Qualidade"].to_numpy(dtype=np.float64)
+    
+    return pd.DataFrame({
+        "SKU": np.char.add("SKU-", np.arange(n_skus).astype(str)),
+        "Concorrente": pd.Categorical.from_codes(competitor, df_competitors["Concorrente"]),
+        "Categoria": pd.Categorical.from_codes(category, list(categories)),
+        "Preco": (np.array(list(categories.values()))[category] * price_index[competitor]
+                  * rng.lognormal(0, 0.35, n_skus)).round(2),
+        "Qualidade": np.clip(quality[competitor] + rng.normal(0, 8, n_skus), 0, 100).round(1)
+    })
+
+@cached_loader(ttl=30 * 60, sources=_sources("produtos"))
 def load_products_data():
     """Carrega dados de produtos e precificação."""
-    df_products = pd.DataFrame({
+    df_products = _dataset("produtos", {
         "Produto": ["Organizador", "Carregador", "Fones", "Processador", "Timer"],
         "Categoria": ["Utilidade", "Eletrônico", "Eletrônico", "Eletrônico", "Utilidade"],
         "Preco": [50, 60, 40, 80, 35],
         "Margem": [75, 70, 80, 65, 78],  # percentuais
-        "Demanda": [85, 90, 75, 60, 80]
+        "Demanda": [85, 90, 75, 60, 80],
+        "Qualidade": [66, 62, 58, 64, 67]  # nota de avaliação (0-100)
     })
     
     return df_products
 
+@cached_loader(ttl=60 * 60, sources=_sources("receita", "investimento"))
 def load_financial_data():
     """Carrega dados financeiros."""
-    df_revenue = pd.DataFrame({
+    df_revenue = _dataset("receita", {
         "Trimestre": ["T1", "T2", "T3", "T4"],
         "Receita": [16000, 37000, 64000, 105000]
     })
     
-    df_investment = pd.DataFrame({
+    df_investment = _dataset("investimento", {
         "Categoria": ["Plataforma", "Marketing", "Produtos", 
                      "Administrativo", "Reserva"],
         "Investimento": [5800, 13200, 8000, 3000, 5000]
@@ -104,6 +232,7 @@ def load_financial_data():
     
     return df_revenue, df_investment
 
+@cached_loader(ttl=24 * 60 * 60, sources=_sources("riscos"))
 def load_swot_data():
     """Carrega dados da análise SWOT."""
     swot = {
@@ -118,7 +247,7 @@ def load_swot_data():
                    "Ambiente econômico volátil"]
     }
     
-    df_risk = pd.DataFrame({
+    df_risk = _dataset("riscos", {
         "Risco": ["Importação", "Qualidade", "Entrega", "Concorrência"],
         "Probabilidade": [0.7, 0.5, 0.6, 0.8],
         "Impacto": [0.8, 0.7, 0.6, 0.9]
@@ -126,14 +255,72 @@ def load_swot_data():
     
     return swot, df_risk
 
-def load_supplier_data():
-    """Carrega dados de fornecedores e logística."""
-    df_suppliers = pd.DataFrame({
+def load_supplier_catalog():
+    """Carrega o cadastro de fornecedores (origem e prazo prometido)."""
+    return _dataset("fornecedores", {
         "Fornecedor": ["AliExpress", "DSers", "Zendrop", 
                       "Mais Que Distribuidora", "Kaisan"],
         "Origem": ["Internacional", "Internacional", "Internacional", 
                   "Nacional", "Nacional"],
         "Prazo_Entrega": [40, 35, 30, 5, 7]
     })
+
+@cached_loader(ttl=30 * 60, sources=_sources("fornecedores", logs=[DELIVERY_LOG]))
+def load_supplier_data():
+    """Carrega dados de fornecedores e logística.
+
+    Além do cadastro, traz os prazos medidos nas entregas (Pedidos, P50, P90,
+    P99 em dias e Taxa_No_Prazo), mantidos incrementalmente por sketches.
+    """
+    return lead_time_summary(load_supplier_catalog())
+
+@cached_loader(ttl=60 * 60, sources=_sources("clientes"))
+def load_customer_data(n_rows=200_000, seed=42):
+    """Carrega a base de clientes (registro a registro).
+
+    Sem o dataset "clientes" ingerido, gera uma amostra sintética
+    coerente com os agregados das demais abas.
+    """
+    return registry.get("clientes", lambda: _customer_frame(n_rows, seed),
+                        version=(_version("clientes"), n_rows, seed))
+
+
+def _customer_frame(n_rows, seed):
+    """Lê o dataset "clientes" ou gera a base sintética."""
+    df_customers = read_dataset("clientes")
+    if df_customers is not None:
+        return df_customers
+    
+    rng = np.random.default_rng(seed)
+    regions = ["Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"]
+    region_weights = np.array([5000, 15000, 7000, 30000, 10000]) / 67000
+    classes = ["C", "D", "E"]
+    class_income = np.array([3500, 2500, 1500])
+    
+    classe = rng.choice(3, size=n_rows, p=[0.45, 0.35, 0.20])
+    renda = class_income[classe] * rng.lognormal(0, 0.15, size=n_rows)
+    
+    df_customers = pd.DataFrame({
+        "Cliente_ID": np.arange(n_rows, dtype=np.int64),
+        "Classe": pd.Categorical.from_codes(classe, classes),
+        "Idade": rng.integers(25, 46, size=n_rows, dtype=np.int16),
+        "Sexo": pd.Categorical.from_codes(
+            rng.choice(2, size=n_rows, p=[0.52, 0.48]), ["Masculino", "Feminino"]),
+        "Regiao": pd.Categorical.from_codes(
+            rng.choice(5, size=n_rows, p=region_weights), regions),
+        "Renda": renda.round(2)
+    })
+    
+    # Comportamento: perfil de uma persona da mesma classe, com ruído
+    by_class = [[i for i, p in enumerate(PERSONAS) if p["Classe"] == c] for c in classes]
+    draw = rng.random(n_rows)
+    latent = np.empty(n_rows, dtype=np.int64)
+    for code, candidates in enumerate(by_class):
+        rows = classe == code
+        latent[rows] = np.array(candidates)[(draw[rows] * len(candidates)).astype(np.int64)]
+    profiles = np.array([p["Comportamento"] for p in PERSONAS], dtype=np.float64)
+    for j, column in enumerate(BEHAVIOR):
+        scores = profiles[latent, j] + rng.normal(0, 12, size=n_rows)
+        df_customers[column] = np.clip(scores, 0, 100).round().astype(np.uint8)
     
-    return df_suppliers
+    return df_customers
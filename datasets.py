@@ -0,0 +1,111 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Colunas de texto com poucos valores distintos viram categoria
+CATEGORY_RATIO = 0.5
+# Erro relativo aceito ao converter float64 em float32
+FLOAT32_RTOL = 1e-6
+# Inteiros não descem abaixo disto: int8/int16 transbordam em contas simples
+# (ex.: Publico * 2), e as tabelas de negócio não justificam o risco
+MIN_INT_DTYPE = np.int32
+
+
+def _downcast_float(values):
+    """Converte para float32 quando a perda de precisão é desprezível."""
+    as_float32 = values.astype(np.float32)
+    finite = np.isfinite(values)
+    if np.allclose(as_float32[finite], values[finite], rtol=FLOAT32_RTOL, atol=0):
+        return as_float32
+    return values
+
+
+def compact_frame(df, category_ratio=CATEGORY_RATIO):
+    """Retorna o DataFrame com categorias no lugar de texto repetido e números reduzidos."""
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            pass
+        elif pd.api.types.is_string_dtype(values) or values.dtype == object:
+            if len(values) and values.nunique(dropna=True) / len(values) <= category_ratio:
+                values = values.astype("category")
+        elif pd.api.types.is_bool_dtype(values):
+            pass
+        elif values.dtype.kind == "i" and values.dtype.itemsize > np.dtype(MIN_INT_DTYPE).itemsize:
+            info = np.iinfo(MIN_INT_DTYPE)
+            if len(values) == 0 or (info.min <= values.min() and values.max() <= info.max):
+                values = values.astype(MIN_INT_DTYPE)
+        elif pd.api.types.is_float_dtype(values) and values.dtype == np.float64:
+            values = pd.Series(_downcast_float(values.to_numpy()), index=values.index, name=column)
+        columns[column] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def frame_bytes(df):
+    """Memória ocupada pelo DataFrame, contando o conteúdo dos textos."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class DatasetRegistry:
+    """Datasets compactados carregados uma vez por processo e compartilhados entre sessões.
+
+    Cada sessão recebe uma cópia rasa (sem copiar dados); com o copy-on-write
+    do pandas, uma alteração feita por uma sessão não chega às demais. O
+    copy-on-write só é sempre ativo a partir do pandas 3, daí o requisito
+    pandas>=3.0.
+    """
+
+    def __init__(self):
+        self._datasets = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, build, version=None):
+        """Retorna o dataset `name`, construindo-o com `build()` na primeira vez.
+
+        `version` identifica a origem (ex.: assinatura do arquivo); se mudar,
+        o dataset é reconstruído.
+        """
+        with self._lock:
+            entry = self._datasets.get(name)
+        if entry is None or entry["version"] != version:
+            df = build()
+            original = frame_bytes(df)
+            df = compact_frame(df)
+            entry = {
+                "df": df,
+                "version": version,
+                "original_bytes": original,
+                "bytes": frame_bytes(df),
+            }
+            with self._lock:
+                self._datasets[name] = entry
+        return entry["df"].copy(deep=False)
+
+    def memory_report(self):
+        """Linhas, colunas e memória (antes/depois da compactação) de cada dataset."""
+        with self._lock:
+            entries = list(self._datasets.items())
+        mb = 1024 * 1024
+        return pd.DataFrame(
+            [{
+                "Dataset": name,
+                "Linhas": len(entry["df"]),
+                "Colunas": entry["df"].shape[1],
+                "MB": entry["bytes"] / mb,
+                "MB original": entry["original_bytes"] / mb,
+                "Economia (%)": 100 * (1 - entry["bytes"] / entry["original_bytes"])
+                if entry["original_bytes"] else 0.0,
+            } for name, entry in sorted(entries)],
+            columns=["Dataset", "Linhas", "Colunas", "MB", "MB original", "Economia (%)"]
+        )
+
+    def clear(self):
+        """Descarta todos os datasets carregados."""
+        with self._lock:
+            self._datasets.clear()
+
+
+# Registro compartilhado por todas as sessões do processo
+registry = DatasetRegistry()
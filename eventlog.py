@@ -0,0 +1,166 @@
+import io
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Bytes lidos do log por bloco (cada bloco termina numa quebra de linha)
+BLOCK_BYTES = 64 << 20
+
+
+class IncrementalAggregator:
+    """Base dos agregadores de logs CSV append-only com checkpoint em disco.
+
+    O checkpoint (JSON ao lado do log) guarda a posição em bytes já
+    processada e o estado da subclasse; cada refresh() lê só as linhas
+    completas acrescentadas depois dela, em blocos de `block_bytes`.
+    Subclasses definem `column_types` (colunas lidas -> tipo Arrow),
+    `initial_state()` e `aggregate(table)`. Linhas que não podem ser lidas
+    são separadas no arquivo de rejeitadas (ao lado do log) e o checkpoint
+    avança mesmo assim.
+    """
+
+    column_types = {}
+
+    def __init__(self, log_path, checkpoint_path=None, block_bytes=BLOCK_BYTES):
+        self.log_path = Path(log_path)
+        self.checkpoint_path = Path(checkpoint_path or self.log_path.with_suffix(".checkpoint.json"))
+        self.rejected_path = self.log_path.with_suffix(".rejeitadas.csv")
+        self.block_bytes = block_bytes
+        self._lock = threading.Lock()
+        self.state = self._load_checkpoint()
+
+    def initial_state(self):
+        """Estado da subclasse antes de qualquer linha processada."""
+        return {}
+
+    def aggregate(self, table):
+        """Acumula no estado uma tabela Arrow com as linhas novas."""
+        raise NotImplementedError
+
+    def _empty_state(self):
+        return {"offset": 0, "header": None, **self.initial_state()}
+
+    def _load_checkpoint(self):
+        try:
+            return json.loads(self.checkpoint_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return self._empty_state()
+
+    def _save_checkpoint(self):
+        """Grava o checkpoint de forma atômica."""
+        tmp = self.checkpoint_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self.state))
+        os.replace(tmp, self.checkpoint_path)
+
+    def _read_block(self, data, header, rejected):
+        """Lê um bloco de linhas completas; linhas inválidas vão para `rejected`."""
+        from pyarrow import csv
+
+        def skip(row):
+            # Número de colunas errado: o pyarrow descarta a linha
+            rejected.append(row.text.encode() + b"\n")
+            return "skip"
+
+        return csv.read_csv(
+            io.BytesIO(data),
+            read_options=csv.ReadOptions(column_names=header),
+            parse_options=csv.ParseOptions(invalid_row_handler=skip),
+            convert_options=csv.ConvertOptions(include_columns=list(self.column_types),
+                                               column_types=self.column_types),
+        )
+
+    def _read_valid(self, data, header, rejected):
+        """Tabelas com as linhas válidas do bloco.
+
+        Um valor que não converte (ex.: texto numa coluna numérica) derruba o
+        bloco inteiro no pyarrow; o bloco é dividido ao meio até isolar as
+        linhas com erro, que vão para `rejected`.
+        """
+        import pyarrow as pa
+
+        skipped = []
+        try:
+            table = self._read_block(data, header, skipped)
+        except pa.ArrowInvalid:
+            middle = data.find(b"\n", len(data) // 2) + 1
+            if middle == len(data):
+                middle = data.rfind(b"\n", 0, len(data) - 1) + 1
+            if middle == 0:
+                rejected.append(data)
+                return []
+            return (self._read_valid(data[:middle], header, rejected)
+                    + self._read_valid(data[middle:], header, rejected))
+        rejected.extend(skipped)
+        return [table]
+
+    def _reject(self, lines):
+        """Acrescenta as linhas inválidas ao arquivo de rejeitadas e avisa no log."""
+        with open(self.rejected_path, "ab") as out:
+            out.writelines(lines)
+        logger.warning("%d linha(s) inválida(s) em %s ignoradas; copiadas para %s",
+                       len(lines), self.log_path, self.rejected_path)
+
+    def refresh(self):
+        """Processa as linhas acrescentadas desde o checkpoint; retorna quantas."""
+        with self._lock:
+            if not self.log_path.exists():
+                return 0
+            size = self.log_path.stat().st_size
+            if size < self.state["offset"]:
+                # Log truncado ou substituído: recomeça do zero
+                self.state = self._empty_state()
+
+            processed = 0
+            with open(self.log_path, "rb") as log:
+                if self.state["header"] is None:
+                    header_line = log.readline()
+                    if not header_line.endswith(b"\n"):
+                        return 0
+                    self.state["header"] = header_line.decode().strip().split(",")
+                    self.state["offset"] = log.tell()
+                header = self.state["header"]
+
+                log.seek(self.state["offset"])
+                while self.state["offset"] < size:
+                    data = log.read(min(self.block_bytes, size - self.state["offset"]))
+                    # Uma linha ainda sendo escrita fica para a próxima atualização
+                    end = data.rfind(b"\n") + 1
+                    if end == 0:
+                        if len(data) < self.block_bytes:
+                            break
+                        raise ValueError(f"Linha maior que o bloco de leitura em {self.log_path}")
+                    rejected = []
+                    for table in self._read_valid(data[:end], header, rejected):
+                        self.aggregate(table)
+                        processed += table.num_rows
+                    if rejected:
+                        self._reject(rejected)
+                    self.state["offset"] += end
+                    log.seek(self.state["offset"])
+                    self._save_checkpoint()
+            return processed
+
+
+_aggregators = {}
+_aggregators_lock = threading.Lock()
+
+
+def shared_aggregator(cls, log_path):
+    """Agregador compartilhado pelas sessões do processo (um por classe e log)."""
+    with _aggregators_lock:
+        key = (cls, str(log_path))
+        if key not in _aggregators:
+            _aggregators[key] = cls(log_path)
+        return _aggregators[key]
+
+
+def append_csv(log_path, df):
+    """Acrescenta linhas ao log, escrevendo o cabeçalho se o arquivo for novo."""
+    log_path = Path(log_path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not log_path.exists() or log_path.stat().st_size == 0
+    df.to_csv(log_path, mode="a", header=new_file, index=False)
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from cache import cached_loader
+from data_loader import _sources, load_customer_data
+
+# Faixas etárias usadas na pirâmide demográfica
+AGE_BINS = [(25, 30), (31, 35), (36, 40), (41, 45)]
+
+
+class AudienceCube:
+    """Contagens e somas de renda pré-agregadas por classe x idade x região x sexo.
+
+    Cada combinação de filtros da sidebar vira um recorte dos arrays e uma
+    soma, sem tocar nos registros: o custo não depende do tamanho da base.
+    """
+
+    dimensions = ("Classe", "Idade", "Regiao", "Sexo")
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.categories = {}
+        codes = []
+        for column in ("Classe", "Regiao", "Sexo"):
+            values = pd.Categorical(df[column])
+            self.categories[column] = list(values.categories)
+            codes.append(values.codes.astype(np.int64))
+        ages = df["Idade"].to_numpy()
+        self.min_age = int(ages.min()) if len(ages) else AGE_BINS[0][0]
+        self.ages = np.arange(self.min_age, int(ages.max()) + 1 if len(ages) else AGE_BINS[-1][1] + 1)
+        classe, regiao, sexo = codes
+        age_codes = ages.astype(np.int64) - self.min_age
+
+        shape = (len(self.categories["Classe"]), len(self.ages),
+                 len(self.categories["Regiao"]), len(self.categories["Sexo"]))
+        flat = np.ravel_multi_index((classe, age_codes, regiao, sexo), shape)
+        size = int(np.prod(shape))
+        self.counts = np.bincount(flat, minlength=size).reshape(shape)
+        self.income = np.bincount(flat, weights=df["Renda"].to_numpy(dtype=np.float64),
+                                  minlength=size).reshape(shape)
+
+    def _slices(self, classe_social, faixa_etaria, regiao):
+        """Índices de cada dimensão para o filtro (listas vazias/None = tudo)."""
+        classes = self.categories["Classe"]
+        class_index = ([classes.index(c) for c in classe_social if c in classes]
+                       if classe_social else slice(None))
+        if faixa_etaria is None:
+            age_index = slice(None)
+        else:
+            low, high = faixa_etaria
+            age_index = slice(max(low - self.min_age, 0), max(high - self.min_age + 1, 0))
+        regions = self.categories["Regiao"]
+        if regiao in (None, "Todas"):
+            region_index = slice(None)
+        else:
+            region_index = [regions.index(regiao)] if regiao in regions else []
+        return class_index, age_index, region_index
+
+    def select(self, classe_social=None, faixa_etaria=None, regiao=None):
+        """Recorte (contagens, somas de renda, idades) do cubo para o filtro."""
+        class_index, age_index, region_index = self._slices(classe_social, faixa_etaria, regiao)
+        counts, income = self.counts, self.income
+        for axis, index in enumerate((class_index, age_index, region_index)):
+            counts = counts[(slice(None),) * axis + (index,)]
+            income = income[(slice(None),) * axis + (index,)]
+        classes = (np.array(self.categories["Classe"])[class_index]
+                   if not isinstance(class_index, slice) else np.array(self.categories["Classe"]))
+        regions = (np.array(self.categories["Regiao"])[region_index]
+                   if not isinstance(region_index, slice) else np.array(self.categories["Regiao"]))
+        return counts, income, self.ages[age_index], list(classes), list(regions)
+
+    def summarize(self, classe_social=None, faixa_etaria=None, regiao=None):
+        """Retorna (df_demo, df_income, df_region, total) para o filtro."""
+        counts, income, ages, classes, regions = self.select(classe_social, faixa_etaria, regiao)
+        sexes = self.categories["Sexo"]
+
+        # Pirâmide: idade x sexo somando classe e região, depois agrupando as faixas
+        by_age_sex = counts.sum(axis=(0, 2))
+        age_bin = np.searchsorted([high for _, high in AGE_BINS[:-1]], ages, side="left")
+        pyramid = np.zeros((len(AGE_BINS), len(sexes)), dtype=np.int64)
+        np.add.at(pyramid, age_bin, by_age_sex)
+        df_demo = pd.DataFrame(pyramid, columns=sexes)
+        df_demo.insert(0, "Faixa_Etaria", [f"{low}-{high}" for low, high in AGE_BINS])
+
+        # Renda média por classe (todas as classes aparecem, mesmo sem clientes no filtro)
+        class_counts = dict(zip(classes, counts.sum(axis=(1, 2, 3))))
+        class_income = dict(zip(classes, income.sum(axis=(1, 2, 3))))
+        renda = [class_income[c] / class_counts[c] if class_counts.get(c) else 0.0
+                 for c in self.categories["Classe"]]
+        df_income = pd.DataFrame({
+            "Classe": self.categories["Classe"],
+            "Renda_Media": np.round(renda, 2)
+        })
+
+        df_region = pd.DataFrame({
+            "Regiao": regions,
+            "Publico": counts.sum(axis=(0, 1, 3))
+        })
+        return df_demo, df_income, df_region, int(counts.sum())
+
+
+@cached_loader(ttl=60 * 60, sources=_sources("clientes"))
+def load_audience_cube():
+    """Carrega o cubo de público pré-agregado (reconstruído a cada atualização dos dados)."""
+    return AudienceCube(load_customer_data())
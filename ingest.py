@@ -0,0 +1,97 @@
+"""Converte as planilhas/CSVs de negócio em datasets colunares (Arrow IPC).
+
+Uso:
+    python ingest.py [--raw-dir data/raw] [--out-dir data/columnar] [--force]
+
+Cada CSV vira um dataset com o nome do arquivo e cada aba de uma planilha
+Excel vira um dataset com o nome da aba. Os arquivos .arrow são gravados
+sem compressão para que data_loader.read_dataset possa mapeá-los em memória.
+A ingestão roda fora do dashboard, uma vez por atualização de dados.
+"""
+import argparse
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from data_loader import DATA_DIR
+from datasets import compact_frame
+
+RAW_DIR = Path(__file__).parent / "data" / "raw"
+
+
+def dataset_name(label):
+    """Normaliza o nome de um arquivo ou aba para nome de dataset."""
+    label = unicodedata.normalize("NFKD", label).encode("ascii", "ignore").decode()
+    return re.sub(r"[^0-9a-z]+", "_", label.lower()).strip("_")
+
+
+def read_source(path):
+    """Lê um arquivo de origem e retorna {nome do dataset: DataFrame}."""
+    if path.suffix.lower() == ".csv":
+        return {dataset_name(path.stem): pd.read_csv(path)}
+    sheets = pd.read_excel(path, sheet_name=None, engine="openpyxl")
+    return {dataset_name(sheet): df for sheet, df in sheets.items()}
+
+
+def to_table(df):
+    """Converte um DataFrame para tabela Arrow com tipos compactos."""
+    return pa.Table.from_pandas(compact_frame(df), preserve_index=False)
+
+
+def write_dataset(table, out_dir, name):
+    """Grava o dataset de forma atômica (leitores nunca veem arquivo parcial)."""
+    target = out_dir / f"{name}.arrow"
+    tmp = target.with_suffix(".arrow.tmp")
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, target)
+    return target
+
+
+def ingest(raw_dir=RAW_DIR, out_dir=DATA_DIR, force=False):
+    """Ingere todos os arquivos novos ou alterados e retorna os datasets gravados."""
+    raw_dir, out_dir = Path(raw_dir), Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    sources = sorted(
+        path for path in raw_dir.glob("*")
+        if path.suffix.lower() in (".csv", ".xlsx", ".xlsm")
+    )
+    for path in sources:
+        # Pula arquivos que não mudaram desde a última ingestão
+        stamp_file = out_dir / f".{path.name}.ingested"
+        if not force and stamp_file.exists() and stamp_file.stat().st_mtime >= path.stat().st_mtime:
+            continue
+
+        start = time.perf_counter()
+        for name, df in read_source(path).items():
+            table = to_table(df)
+            target = write_dataset(table, out_dir, name)
+            written.append(target)
+            print(f"{path.name} -> {target.name}: {table.num_rows} linhas, "
+                  f"{table.num_columns} colunas")
+        stamp_file.touch()
+        print(f"{path.name}: {time.perf_counter() - start:.2f}s")
+
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--raw-dir", default=RAW_DIR, type=Path)
+    parser.add_argument("--out-dir", default=DATA_DIR, type=Path)
+    parser.add_argument("--force", action="store_true",
+                        help="reprocessa arquivos mesmo sem alteração")
+    args = parser.parse_args()
+    written = ingest(args.raw_dir, args.out_dir, args.force)
+    print(f"{len(written)} dataset(s) gravado(s) em {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
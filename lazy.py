@@ -0,0 +1,41 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Módulo que só é importado no primeiro acesso a um atributo.
+
+    O primeiro acesso importa sob um lock: sessões do Streamlit rodam em
+    threads, e o importlib.util.LazyLoader do Python 3.11 não é seguro
+    quando duas threads tocam o módulo ao mesmo tempo.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._lock = threading.Lock()
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.__name__)
+                module = self._module
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """Retorna o módulo `name` adiando sua execução até o primeiro uso.
+
+    Útil para dependências pesadas (ex.: plotly.express) que nem toda
+    execução do app precisa; o custo do import sai do caminho de startup.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return LazyModule(name)
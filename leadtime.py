@@ -0,0 +1,265 @@
+"""Prazos de entrega por fornecedor a partir do log de eventos de pedidos.
+
+Uso:
+    python leadtime.py [--log data/fornecedores/entregas.csv] [--append 100000]
+
+O log é um CSV append-only com cabeçalho
+Pedido_ID,Fornecedor,Data_Pedido,Data_Entrega,Prazo_Prometido (datas ISO,
+prazo prometido em dias). Cada fornecedor mantém um sketch de quantis
+(estilo DDSketch: buckets logarítmicos com erro relativo limitado), então
+p50/p90/p99 saem sem ordenar o histórico e o estado cabe no checkpoint.
+"""
+import argparse
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from eventlog import IncrementalAggregator, append_csv, shared_aggregator
+
+# Log de eventos de entrega (o checkpoint do agregador fica ao lado)
+DELIVERY_LOG = Path(os.environ.get("POBISHOP_DELIVERY_LOG",
+                                   Path(__file__).parent / "data" / "fornecedores" / "entregas.csv"))
+# Erro relativo dos quantis estimados pelos sketches
+RELATIVE_ACCURACY = 0.01
+# Prazos abaixo disto (dias) contam como entrega imediata
+MIN_LEAD_DAYS = 1e-3
+# Quantis exibidos no dashboard
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class QuantileSketch:
+    """Histograma em buckets logarítmicos com quantis de erro relativo limitado.
+
+    O bucket i cobre (gamma^(i-1), gamma^i]; o valor estimado de um quantil
+    fica a no máximo `relative_accuracy` do valor real. Sketches se somam
+    (merge), o que permite agregar blocos e fornecedores.
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.zero_count
+
+    def _ensure(self, low, high):
+        """Amplia o vetor de contagens para cobrir os buckets [low, high]."""
+        if len(self.counts) == 0:
+            self.offset = low
+            self.counts = np.zeros(high - low + 1, dtype=np.int64)
+            return
+        start = min(low, self.offset)
+        stop = max(high, self.offset + len(self.counts) - 1)
+        if start == self.offset and stop == self.offset + len(self.counts) - 1:
+            return
+        counts = np.zeros(stop - start + 1, dtype=np.int64)
+        counts[self.offset - start:self.offset - start + len(self.counts)] = self.counts
+        self.offset, self.counts = start, counts
+
+    def add(self, values):
+        """Acrescenta um vetor de valores (não negativos) ao sketch; NaN é ignorado."""
+        values = np.asarray(values, dtype=np.float64)
+        # Pedidos ainda não entregues chegam como NaN e não entram nos quantis
+        values = values[~np.isnan(values)]
+        positive = values > MIN_LEAD_DAYS
+        self.zero_count += int(len(values) - positive.sum())
+        values = values[positive]
+        if len(values) == 0:
+            return
+        index = np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+        low, high = int(index.min()), int(index.max())
+        self._ensure(low, high)
+        self.counts += np.bincount(index - self.offset, minlength=len(self.counts))
+
+    def merge(self, other):
+        """Soma as contagens de outro sketch com a mesma precisão."""
+        self.zero_count += other.zero_count
+        if len(other.counts):
+            self._ensure(other.offset, other.offset + len(other.counts) - 1)
+            start = other.offset - self.offset
+            self.counts[start:start + len(other.counts)] += other.counts
+
+    def quantile(self, q):
+        """Valor estimado do quantil q (0 a 1); None se o sketch está vazio."""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulative = np.cumsum(self.counts)
+        bucket = int(np.searchsorted(cumulative, rank - self.zero_count, side="right"))
+        return 2 * self.gamma ** (bucket + self.offset) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {"alpha": self.relative_accuracy, "offset": self.offset,
+                "counts": self.counts.tolist(), "zero": self.zero_count}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["alpha"])
+        sketch.offset = data["offset"]
+        sketch.counts = np.array(data["counts"], dtype=np.int64)
+        sketch.zero_count = data["zero"]
+        return sketch
+
+
+class LeadTimeAggregator(IncrementalAggregator):
+    """Mantém um sketch de prazos e a contagem de entregas no prazo por fornecedor."""
+
+    column_types = {"Fornecedor": "string", "Data_Pedido": "timestamp[s]",
+                    "Data_Entrega": "timestamp[s]", "Prazo_Prometido": "float64"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sketches = {name: QuantileSketch.from_dict(data["sketch"])
+                         for name, data in self.state["fornecedores"].items()}
+
+    def initial_state(self):
+        return {"fornecedores": {}}
+
+    def _empty_state(self):
+        # Recomeço do zero (log truncado) também descarta os sketches
+        self.sketches = {}
+        return super()._empty_state()
+
+    def aggregate(self, table):
+        """Acrescenta os prazos das entregas novas aos sketches de cada fornecedor."""
+        import pyarrow.compute as pc
+
+        seconds = pc.subtract(table["Data_Entrega"], table["Data_Pedido"]).cast("int64")
+        lead_days = np.clip(seconds.to_numpy(zero_copy_only=False) / 86400, 0, None)
+        on_time = lead_days <= table["Prazo_Prometido"].to_numpy(zero_copy_only=False)
+
+        encoded = pc.dictionary_encode(table["Fornecedor"]).combine_chunks()
+        codes = encoded.indices.to_numpy(zero_copy_only=False)
+        names = encoded.dictionary.to_pylist()
+
+        suppliers = self.state["fornecedores"]
+        for name, rows in zip(names, _group_rows(codes, len(names))):
+            sketch = self.sketches.setdefault(name, QuantileSketch())
+            sketch.add(lead_days[rows])
+            entry = suppliers.setdefault(name, {"no_prazo": 0})
+            entry["no_prazo"] += int(on_time[rows].sum())
+            entry["sketch"] = sketch.to_dict()
+
+    def summary(self):
+        """Pedidos, p50/p90/p99 (dias) e taxa de entrega no prazo por fornecedor."""
+        with self._lock:
+            on_time = {name: data["no_prazo"] for name, data in self.state["fornecedores"].items()}
+            return summarize(dict(self.sketches), on_time)
+
+
+def _group_rows(codes, n_groups):
+    """Posições das linhas de cada código 0..n_groups-1, com uma única ordenação."""
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(1, n_groups))
+    return np.split(order, bounds)
+
+
+def summarize(sketches, on_time):
+    """Tabela de pedidos, p50/p90/p99 (dias) e taxa no prazo a partir dos sketches."""
+    rows = []
+    for name, sketch in sketches.items():
+        total = sketch.count
+        rows.append({
+            "Fornecedor": name,
+            "Pedidos": total,
+            **{f"P{round(q * 100)}": sketch.quantile(q) for q in QUANTILES},
+            "Taxa_No_Prazo": on_time[name] / total if total else None,
+        })
+    return pd.DataFrame(rows, columns=["Fornecedor", "Pedidos", "P50", "P90", "P99",
+                                       "Taxa_No_Prazo"])
+
+
+def get_aggregator(log_path=DELIVERY_LOG):
+    """Agregador compartilhado pelas sessões do processo."""
+    return shared_aggregator(LeadTimeAggregator, log_path)
+
+
+def _synthetic_lead_times(df_suppliers, n_events, rng):
+    """Sorteia fornecedor, prazo nominal e prazo real (dias) de cada evento.
+
+    O prazo real é lognormal com mediana ~90% do nominal e cauda longa
+    (alfândega, greves), mais pesada nos fornecedores internacionais.
+    """
+    supplier = rng.integers(0, len(df_suppliers), n_events)
+    nominal = df_suppliers["Prazo_Entrega"].to_numpy(dtype=np.float64)[supplier]
+    international = (df_suppliers["Origem"].to_numpy() == "Internacional")[supplier]
+    sigma = np.where(international, 0.35, 0.25)
+    return supplier, nominal, nominal * 0.9 * rng.lognormal(0, sigma)
+
+
+def synthetic_events(df_suppliers, n_events, seed=None, start="2025-01-01"):
+    """Gera eventos de entrega no formato do log."""
+    rng = np.random.default_rng(seed)
+    supplier, nominal, lead_days = _synthetic_lead_times(df_suppliers, n_events, rng)
+    ordered = np.datetime64(start, "s") + (rng.uniform(0, 365, n_events) * 86400).astype("timedelta64[s]")
+    delivered = ordered + (lead_days * 86400).astype("timedelta64[s]")
+    return pd.DataFrame({
+        "Pedido_ID": rng.integers(0, 2**62, n_events),
+        "Fornecedor": df_suppliers["Fornecedor"].to_numpy()[supplier],
+        "Data_Pedido": np.datetime_as_string(ordered),
+        "Data_Entrega": np.datetime_as_string(delivered),
+        "Prazo_Prometido": nominal,
+    })
+
+
+def synthetic_summary(df_suppliers, n_events=100_000, seed=11):
+    """Resumo de prazos a partir de eventos sintéticos (sem log de entregas)."""
+    rng = np.random.default_rng(seed)
+    supplier, nominal, lead_days = _synthetic_lead_times(df_suppliers, n_events, rng)
+    sketches, on_time = {}, {}
+    for name, rows in zip(df_suppliers["Fornecedor"], _group_rows(supplier, len(df_suppliers))):
+        sketches[name] = QuantileSketch()
+        sketches[name].add(lead_days[rows])
+        on_time[name] = int((lead_days[rows] <= nominal[rows]).sum())
+    return summarize(sketches, on_time)
+
+
+def lead_time_summary(df_suppliers, log_path=DELIVERY_LOG):
+    """Atualiza os sketches com os eventos novos e junta o resumo ao cadastro de fornecedores.
+
+    Sem log de entregas, usa eventos sintéticos coerentes com os prazos nominais.
+    """
+    if Path(log_path).exists():
+        aggregator = get_aggregator(log_path)
+        aggregator.refresh()
+        summary = aggregator.summary()
+    else:
+        summary = synthetic_summary(df_suppliers)
+    return df_suppliers.merge(summary, on="Fornecedor", how="left")
+
+
+def append_events(log_path, df_suppliers, n_events, seed=None):
+    """Acrescenta eventos sintéticos ao log (para testes e demonstrações)."""
+    append_csv(log_path, synthetic_events(df_suppliers, n_events, seed))
+
+
+def main():
+    from data_loader import load_supplier_catalog
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", type=Path, default=DELIVERY_LOG)
+    parser.add_argument("--append", type=int, default=0,
+                        help="acrescenta N eventos sintéticos antes de atualizar")
+    args = parser.parse_args()
+
+    df_suppliers = load_supplier_catalog()
+    if args.append:
+        append_events(args.log, df_suppliers, args.append)
+    aggregator = LeadTimeAggregator(args.log)
+    print(f"{aggregator.refresh()} eventos novos processados")
+    print(aggregator.summary().round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
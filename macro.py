@@ -0,0 +1,257 @@
+"""Indicadores macroeconômicos (câmbio, Selic, inflação) atualizados em segundo plano.
+
+Uso (servidor stub que substitui a fonte real em desenvolvimento):
+    python macro.py --stub [--port 8765] [--delay 0]
+
+    POBISHOP_MACRO_PROVIDER=http POBISHOP_MACRO_URL=http://127.0.0.1:8765/ streamlit run app.py
+
+Em produção, POBISHOP_MACRO_PROVIDER=bcb liga as séries do Banco Central;
+sem a variável ficam os valores padrão, fixos e sem acesso à rede (nem
+thread de atualização).
+
+O dashboard nunca espera a fonte: MacroFeed.snapshot() devolve o último
+valor bom em memória, e uma thread renova os valores no intervalo
+configurado (stale-while-revalidate). Sem nenhuma atualização bem-sucedida
+ficam os valores padrão.
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Valores usados até a primeira atualização bem-sucedida
+DEFAULTS = {"cambio": 5.2, "selic": 15.0, "inflacao": 5.06}
+# Intervalo entre atualizações e espera após uma falha (segundos)
+REFRESH_SECONDS = float(os.environ.get("POBISHOP_MACRO_REFRESH", 15 * 60))
+RETRY_SECONDS = 60
+# Limites de conexão e leitura de cada requisição (segundos)
+CONNECT_TIMEOUT = 2.0
+READ_TIMEOUT = 5.0
+
+
+def _pool():
+    """Pool de conexões HTTP com timeouts e poucas tentativas."""
+    import urllib3
+
+    return urllib3.PoolManager(
+        maxsize=4,
+        timeout=urllib3.Timeout(connect=CONNECT_TIMEOUT, read=READ_TIMEOUT),
+        retries=urllib3.Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+    )
+
+
+class MacroProvider:
+    """Fonte de indicadores: fetch() retorna {"cambio", "selic", "inflacao"}.
+
+    A base devolve os valores padrão, fixos; só fontes com `live` são
+    renovadas em segundo plano.
+    """
+
+    name = "padrão"
+    live = False
+
+    def fetch(self):
+        return dict(DEFAULTS)
+
+
+class HTTPProvider(MacroProvider):
+    """Lê os três indicadores de um endpoint JSON (ex.: o stub de macro.py)."""
+
+    name = "servidor HTTP"
+    live = True
+
+    def __init__(self, url):
+        self.url = url
+        self._http = _pool()
+
+    def fetch(self):
+        response = self._http.request("GET", self.url)
+        if response.status != 200:
+            raise RuntimeError(f"{self.url} respondeu {response.status}")
+        data = json.loads(response.data)
+        return {key: float(data[key]) for key in DEFAULTS}
+
+
+class BCBProvider(MacroProvider):
+    """Séries do Banco Central (SGS): dólar PTAX venda, meta Selic e IPCA em 12 meses."""
+
+    name = "Banco Central (SGS)"
+    live = True
+    URL = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{}/dados/ultimos/1?formato=json"
+    SERIES = {"cambio": 1, "selic": 432, "inflacao": 13522}
+
+    def __init__(self):
+        self._http = _pool()
+
+    def fetch(self):
+        values = {}
+        for key, code in self.SERIES.items():
+            response = self._http.request("GET", self.URL.format(code))
+            if response.status != 200:
+                raise RuntimeError(f"série {code} respondeu {response.status}")
+            values[key] = float(json.loads(response.data)[-1]["valor"])
+        return values
+
+
+PROVIDERS = {"padrao": MacroProvider, "http": HTTPProvider, "bcb": BCBProvider}
+
+
+def provider_from_env():
+    """Cria o provedor configurado por POBISHOP_MACRO_PROVIDER (padrao, http ou bcb).
+
+    Nome desconhecido cai no provedor padrão, com um aviso no log.
+    """
+    kind = os.environ.get("POBISHOP_MACRO_PROVIDER", "padrao")
+    if kind not in PROVIDERS:
+        logger.warning("POBISHOP_MACRO_PROVIDER=%r desconhecido (opções: %s); usando padrao",
+                       kind, ", ".join(PROVIDERS))
+        kind = "padrao"
+    if kind == "http":
+        return HTTPProvider(os.environ.get("POBISHOP_MACRO_URL", "http://127.0.0.1:8765/"))
+    return PROVIDERS[kind]()
+
+
+class MacroFeed:
+    """Guarda o último valor bom e o renova numa thread em segundo plano."""
+
+    def __init__(self, provider, refresh_seconds=REFRESH_SECONDS, retry_seconds=RETRY_SECONDS):
+        self.provider = provider
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self._values = dict(DEFAULTS)
+        self._updated_at = None
+        self._error = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Inicia a thread de atualização (uma vez; nunca para fontes fixas)."""
+        if not self.provider.live:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="macro-feed", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            wait = self.refresh_seconds if self.update() else self.retry_seconds
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def update(self):
+        """Busca os indicadores na fonte; em caso de falha mantém os valores atuais."""
+        try:
+            values = self.provider.fetch()
+        except Exception as error:
+            with self._lock:
+                self._error = f"{type(error).__name__}: {error}"
+            return False
+        with self._lock:
+            self._values = values
+            self._updated_at = time.time()
+            self._error = None
+        return True
+
+    def snapshot(self):
+        """Último valor bom em memória, sem nunca bloquear na fonte."""
+        self.start()
+        with self._lock:
+            return {
+                **self._values,
+                "fonte": self.provider.name if self._updated_at else "valores padrão",
+                "ao_vivo": self.provider.live,
+                "atualizado_em": self._updated_at,
+                "erro": self._error,
+            }
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_feed():
+    """Feed compartilhado pelas sessões do processo."""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = MacroFeed(provider_from_env())
+        return _feed
+
+
+def format_rate(value):
+    """Formata uma taxa percentual como no dashboard (15%, 5.06%)."""
+    return f"{round(value, 2):g}%"
+
+
+def macro_kpis(snapshot=None):
+    """KPIs de inflação e Selic a partir do último valor bom."""
+    snapshot = snapshot or get_feed().snapshot()
+    return {
+        "Inflação": format_rate(snapshot["inflacao"]),
+        "Taxa Selic": format_rate(snapshot["selic"]),
+    }
+
+
+def describe(snapshot):
+    """Texto curto com a origem e a idade dos indicadores."""
+    if not snapshot["ao_vivo"]:
+        return "Indicadores: valores padrão fixos (sem fonte ao vivo configurada)"
+    if snapshot["atualizado_em"] is None:
+        text = "Indicadores: valores padrão até a primeira atualização"
+    else:
+        minutes = (time.time() - snapshot["atualizado_em"]) / 60
+        text = f"Indicadores: {snapshot['fonte']}, atualizados há {minutes:.0f} min"
+    if snapshot["erro"]:
+        text += " (última atualização falhou)"
+    return text
+
+
+def serve_stub(port, delay=0.0, values=None):
+    """Servidor HTTP local que responde os indicadores em JSON, com atraso opcional."""
+    payload = json.dumps(values or DEFAULTS).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stub", action="store_true", help="sobe o servidor stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="atraso de cada resposta (s)")
+    parser.add_argument("--cambio", type=float, default=DEFAULTS["cambio"])
+    parser.add_argument("--selic", type=float, default=DEFAULTS["selic"])
+    parser.add_argument("--inflacao", type=float, default=DEFAULTS["inflacao"])
+    args = parser.parse_args()
+
+    if args.stub:
+        values = {"cambio": args.cambio, "selic": args.selic, "inflacao": args.inflacao}
+        server = serve_stub(args.port, args.delay, values)
+        print(f"Stub em http://127.0.0.1:{args.port}/ -> {values}")
+        server.serve_forever()
+    else:
+        feed = MacroFeed(provider_from_env())
+        feed.update()
+        print(feed.snapshot())
+
+
+if __name__ == "__main__":
+    main()
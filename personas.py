@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from cache import cached_loader
+from data_loader import BEHAVIOR, _sources, load_customer_data, load_target_audience_data
+
+# Linhas por lote na atribuição (limita a matriz de distâncias em memória)
+CHUNK_ROWS = 1 << 18
+# Diferença de cada atributo que pesa uma unidade na distância
+AGE_SCALE = 5.0  # anos
+CLASS_SCALE = 1.0  # classes de renda vizinhas (C-D, D-E)
+SCORE_SCALE = 15.0  # pontos de comportamento (0-100)
+# Classes de renda em ordem (a distância entre classes é a diferença de posição)
+CLASSES = ["C", "D", "E"]
+
+
+class PersonaAssignment:
+    """Persona mais próxima de cada cliente por idade, classe e comportamento.
+
+    Os clientes são processados em lotes de `chunk_rows` linhas: cada lote
+    vira uma matriz de atributos normalizados e a persona mais próxima sai
+    de um produto matricial com os centróides. Contagens e somas das
+    pontuações por persona são acumuladas no mesmo laço. Atributos de
+    comportamento ausentes na base ficam fora da distância. Clientes com
+    classe fora de CLASSES não recebem persona (código -1 em `codes`) e
+    são contados em `n_unassigned`.
+    """
+
+    def __init__(self, df, personas, chunk_rows=CHUNK_ROWS):
+        self.names = [persona["Nome"] for persona in personas]
+        self.behavior = [column for column in BEHAVIOR if column in df.columns]
+        behavior_index = [list(BEHAVIOR).index(column) for column in self.behavior]
+
+        # Centróides normalizados: idade, classe e as pontuações presentes na base
+        centroids = np.array([
+            [persona["Idade"] / AGE_SCALE, CLASSES.index(persona["Classe"]) / CLASS_SCALE,
+             *(np.array(persona["Comportamento"])[behavior_index] / SCORE_SCALE)]
+            for persona in personas
+        ])
+        # Distância ao quadrado sem o termo do cliente: |c|² - 2 x·c
+        centroid_norms = (centroids ** 2).sum(axis=1)
+
+        classes = pd.Categorical(df["Classe"], categories=CLASSES).codes
+        known = np.flatnonzero(classes >= 0)
+        self.n_unassigned = len(df) - len(known)
+        self.n_rows = len(known)
+        self.codes = np.full(len(df), -1, dtype=np.int8)
+        if self.n_unassigned:
+            # Classe desconhecida não tem distância definida: a linha fica de fora
+            df = df.take(known)
+            classes = classes[known]
+        ages = df["Idade"].to_numpy()
+        scores = [df[column].to_numpy() for column in self.behavior]
+
+        k = len(personas)
+        codes_out = self.codes[known] if self.n_unassigned else self.codes
+        self.counts = np.zeros(k, dtype=np.int64)
+        self.score_sums = np.zeros((k, len(self.behavior)))
+        features = np.empty((min(chunk_rows, self.n_rows), centroids.shape[1]))
+        for start in range(0, self.n_rows, chunk_rows):
+            stop = min(start + chunk_rows, self.n_rows)
+            batch = features[:stop - start]
+            np.divide(ages[start:stop], AGE_SCALE, out=batch[:, 0])
+            np.divide(classes[start:stop], CLASS_SCALE, out=batch[:, 1])
+            for j, values in enumerate(scores):
+                np.divide(values[start:stop], SCORE_SCALE, out=batch[:, 2 + j])
+
+            codes = np.argmin(centroid_norms - 2 * (batch @ centroids.T), axis=1)
+            codes_out[start:stop] = codes
+            self.counts += np.bincount(codes, minlength=k)
+            for j, values in enumerate(scores):
+                self.score_sums[:, j] += np.bincount(codes, weights=values[start:stop], minlength=k)
+        if self.n_unassigned:
+            self.codes[known] = codes_out
+
+    def summary(self):
+        """Clientes e participação (%) de cada persona entre os clientes atribuídos."""
+        return pd.DataFrame({
+            "Persona": self.names,
+            "Clientes": self.counts,
+            "Participacao": 100 * self.counts / max(self.n_rows, 1),
+        })
+
+    def profiles(self):
+        """Pontuação média de cada atributo por persona (formato longo, para o radar)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = self.score_sums / self.counts[:, None]
+        return pd.DataFrame({
+            "Persona": np.repeat(self.names, len(self.behavior)),
+            "Categoria": [BEHAVIOR[column] for column in self.behavior] * len(self.names),
+            "Pontuacao": means.ravel().round(1),
+        })
+
+
+@cached_loader(ttl=60 * 60, sources=_sources("clientes", "demografia", "renda", "comportamento"))
+def load_persona_assignment():
+    """Carrega a persona de cada cliente da base (recalculada a cada atualização dos dados)."""
+    _, _, _, personas = load_target_audience_data()
+    return PersonaAssignment(load_customer_data(), personas)
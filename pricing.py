@@ -0,0 +1,254 @@
+import gzip
+import os
+import tempfile
+import time
+import weakref
+from contextlib import ExitStack
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Quantidade máxima de células (produto x imposto x margem) por bloco
+CHUNK_CELLS = 2_000_000
+
+
+def suggested_price(preco_custo, taxa_imposto, margem_desejada):
+    """Calcula o preço de venda (aceita escalares ou arrays NumPy).
+
+    As taxas são percentuais; a margem é sobre o preço de venda e precisa
+    ser menor que 100% (ValueError caso contrário).
+    """
+    _check_margins(margem_desejada)
+    custo_total = preco_custo * (1 + taxa_imposto / 100)
+    return custo_total / (1 - margem_desejada / 100)
+
+
+def rate_range(low, high, step):
+    """Gera os percentuais de low a high (inclusive) com o passo dado."""
+    return np.round(np.arange(low, high + step / 2, step), 2)
+
+
+def product_costs(df_products):
+    """Estima o custo de cada produto a partir do preço e da margem atuais."""
+    return (df_products["Preco"] * (1 - df_products["Margem"] / 100)).to_numpy(dtype=np.float64)
+
+
+def _check_margins(margins):
+    margins = np.asarray(margins, dtype=np.float64)
+    if np.any(margins >= 100):
+        raise ValueError("A margem sobre o preço de venda precisa ser menor que 100%.")
+    return margins
+
+
+def _check_grid(tax_rates, margins):
+    return np.asarray(tax_rates, dtype=np.float64), _check_margins(margins)
+
+
+def _product_chunks(n_products, cells_per_product, chunk_cells):
+    """Divide os produtos em blocos com no máximo chunk_cells células."""
+    step = max(1, chunk_cells // max(cells_per_product, 1))
+    for start in range(0, n_products, step):
+        yield slice(start, min(start + step, n_products))
+
+
+def iter_sensitivity_chunks(costs, tax_rates, margins, chunk_cells=CHUNK_CELLS):
+    """Gera blocos (produtos, preços[produto, imposto, margem]) do grid completo."""
+    costs = np.asarray(costs, dtype=np.float64)
+    tax_rates, margins = _check_grid(tax_rates, margins)
+
+    # Fatores separáveis: preço = custo x (1 + imposto) / (1 - margem)
+    tax_factor = 1 + tax_rates / 100
+    margin_factor = 1 / (1 - margins / 100)
+    unit_grid = np.multiply.outer(tax_factor, margin_factor)
+
+    for chunk in _product_chunks(len(costs), unit_grid.size, chunk_cells):
+        yield chunk, costs[chunk, None, None] * unit_grid[None, :, :]
+
+
+def sensitivity_summary(costs, tax_rates, margins, chunk_cells=CHUNK_CELLS):
+    """Agrega o grid em blocos: preço médio, mínimo e máximo por imposto x margem."""
+    tax_rates, margins = _check_grid(tax_rates, margins)
+    shape = (len(tax_rates), len(margins))
+    total = np.zeros(shape)
+    minimum = np.full(shape, np.inf)
+    maximum = np.full(shape, -np.inf)
+
+    for _, prices in iter_sensitivity_chunks(costs, tax_rates, margins, chunk_cells):
+        total += prices.sum(axis=0)
+        np.minimum(minimum, prices.min(axis=0), out=minimum)
+        np.maximum(maximum, prices.max(axis=0), out=maximum)
+
+    return {
+        "media": pd.DataFrame(total / max(len(costs), 1), index=tax_rates, columns=margins),
+        "minimo": pd.DataFrame(minimum, index=tax_rates, columns=margins),
+        "maximo": pd.DataFrame(maximum, index=tax_rates, columns=margins),
+    }
+
+
+def write_sensitivity_csv(products, costs, tax_rates, margins, output, chunk_cells=CHUNK_CELLS):
+    """Grava o grid completo em CSV gzip, bloco a bloco, direto em `output`.
+
+    `output` é um caminho ou arquivo binário aberto; só um bloco de linhas
+    fica em memória por vez. Retorna o número de linhas gravadas.
+    """
+    products = np.asarray(products)
+    tax_rates, margins = _check_grid(tax_rates, margins)
+    # Blocos menores aqui: cada célula vira uma linha de texto
+    chunk_cells = min(chunk_cells, 500_000)
+
+    rows = 0
+    with gzip.open(output, mode="wb", compresslevel=1) as gz:
+        header = True
+        for chunk, prices in iter_sensitivity_chunks(costs, tax_rates, margins, chunk_cells):
+            n_products = prices.shape[0]
+            cells = len(tax_rates) * len(margins)
+            df_chunk = pd.DataFrame({
+                "Produto": np.repeat(products[chunk], cells),
+                "Taxa_Importacao": np.tile(np.repeat(tax_rates, len(margins)), n_products),
+                "Margem": np.tile(margins, len(tax_rates) * n_products),
+                "Preco_Venda": prices.reshape(-1).round(2)
+            })
+            gz.write(df_chunk.to_csv(index=False, header=header).encode())
+            header = False
+            rows += len(df_chunk)
+    return rows
+
+
+# Tamanho do bloco lido por vez no cálculo de importação em lote
+CSV_BLOCK_BYTES = 4 << 20
+# Diretório dos resultados do cálculo em lote
+BATCH_DIR = Path(tempfile.gettempdir()) / "pobishop-lote"
+# Idade máxima (s) de um resultado no disco antes da varredura removê-lo
+BATCH_TTL = 6 * 60 * 60
+# Maior arquivo oferecido para download: o st.download_button carrega o
+# arquivo inteiro na memória do servidor no clique
+DOWNLOAD_MAX_BYTES = 200 << 20
+
+
+def import_costs(valor_produto, taxa_cambio, taxa_importacao):
+    """Calcula valor em reais, imposto e valor final (escalares ou arrays)."""
+    valor_reais = valor_produto * taxa_cambio
+    imposto = valor_reais * (taxa_importacao / 100)
+    return valor_reais, imposto, valor_reais + imposto
+
+
+def process_import_csv(source, output, taxa_cambio, taxa_importacao,
+                       block_size=CSV_BLOCK_BYTES, compression=None, compress_output=False):
+    """Enriquece um CSV de SKUs com os custos de importação, bloco a bloco.
+
+    O CSV precisa da coluna Valor_USD; uma coluna Taxa_Importacao (%) por
+    linha, quando presente e preenchida, substitui a taxa padrão. A leitura
+    e a escrita são em streaming (pyarrow.csv), então o arquivo nunca fica
+    inteiro em memória. `output` é um caminho ou arquivo binário aberto;
+    com compress_output o resultado é gravado em gzip.
+    Retorna estatísticas da execução (linhas, segundos, linhas/s).
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    start = time.perf_counter()
+    rows = 0
+
+    stream = pa.PythonFile(source, mode="r") if hasattr(source, "read") else pa.OSFile(os.fspath(source))
+    if compression:
+        stream = pa.CompressedInputStream(stream, compression)
+    reader = pa_csv.open_csv(
+        stream,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={"Valor_USD": pa.float64(), "Taxa_Importacao": pa.float64()}
+        )
+    )
+    names = reader.schema.names
+    if "Valor_USD" not in names:
+        raise ValueError("O CSV precisa da coluna Valor_USD.")
+    schema = reader.schema
+    for column in ("Valor_Reais", "Imposto", "Valor_Final"):
+        schema = schema.append(pa.field(column, pa.float64()))
+
+    with ExitStack() as stack:
+        out = output
+        if isinstance(output, (str, os.PathLike)):
+            out = stack.enter_context(open(output, "wb"))
+        if compress_output:
+            out = stack.enter_context(gzip.GzipFile(fileobj=out, mode="wb", compresslevel=1))
+        with pa_csv.CSVWriter(out, schema) as writer:
+            for batch in reader:
+                valor_usd = batch.column(names.index("Valor_USD")).to_numpy(zero_copy_only=False)
+                taxa = np.full(batch.num_rows, float(taxa_importacao))
+                if "Taxa_Importacao" in names:
+                    taxa_linha = batch.column(names.index("Taxa_Importacao")).to_numpy(zero_copy_only=False)
+                    taxa = np.where(np.isnan(taxa_linha), taxa, taxa_linha)
+
+                valor_reais, imposto, valor_final = import_costs(valor_usd, taxa_cambio, taxa)
+                columns = batch.columns + [
+                    pa.array(np.round(valor_reais, 2), from_pandas=True),
+                    pa.array(np.round(imposto, 2), from_pandas=True),
+                    pa.array(np.round(valor_final, 2), from_pandas=True),
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+                rows += batch.num_rows
+
+    elapsed = time.perf_counter() - start
+    return {
+        "linhas": rows,
+        "segundos": elapsed,
+        "linhas_por_segundo": rows / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def sweep_batch_results(ttl=BATCH_TTL):
+    """Remove resultados em lote mais antigos que `ttl` segundos (ex.: de processos encerrados)."""
+    cutoff = time.time() - ttl
+    for path in BATCH_DIR.glob("*.csv*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+class BatchResult:
+    """Arquivo calculado em lote, gravado em disco e apagado junto com o objeto.
+
+    O objeto fica no session_state: quando outro lote o substitui ou a
+    sessão termina, ele é coletado e o arquivo é removido. O que sobrar
+    de um processo encerrado à força sai na varredura por idade, feita a
+    cada novo lote.
+    """
+
+    def __init__(self, name, suffix=".csv"):
+        sweep_batch_results()
+        BATCH_DIR.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=BATCH_DIR)
+        os.close(fd)
+        self.path = Path(path)
+        self.name = name
+        self.stats = None
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+
+    def exists(self):
+        return self.path.exists()
+
+    def size(self):
+        return self.path.stat().st_size
+
+    def downloadable(self):
+        """True se o arquivo cabe no limite de download (DOWNLOAD_MAX_BYTES)."""
+        return self.size() <= DOWNLOAD_MAX_BYTES
+
+    def read_bytes(self):
+        """Conteúdo do arquivo calculado (aberto e fechado a cada leitura)."""
+        return self.path.read_bytes()
+
+    def discard(self):
+        """Apaga o arquivo agora, sem esperar a coleta do objeto."""
+        self._finalizer()
@@ -0,0 +1,96 @@
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Quantidade de medições mantidas no buffer circular do processo
+RING_SIZE = 5000
+
+_records = deque(maxlen=RING_SIZE)
+_lock = threading.Lock()
+_run_ids = itertools.count(1)
+# Seção em renderização na thread atual (cada sessão do Streamlit roda numa thread)
+_current = threading.local()
+
+
+def new_run_id():
+    """Gera um identificador único (no processo) para um rerun."""
+    return next(_run_ids)
+
+
+def record(stage, name, seconds, cached=None):
+    """Registra uma medição se houver uma seção sendo renderizada nesta thread."""
+    section = getattr(_current, "section", None)
+    if section is None:
+        return
+    with _lock:
+        _records.append({
+            "ts": time.time(),
+            "run": _current.run_id,
+            "section": section,
+            "stage": stage,
+            "name": name,
+            "seconds": seconds,
+            "cached": cached,
+        })
+
+
+@contextmanager
+def timed(stage, name, cached=None):
+    """Mede o bloco e registra o tempo na seção atual."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, name, time.perf_counter() - start, cached)
+
+
+@contextmanager
+def section(name, run_id):
+    """Marca a seção em renderização e registra seu tempo total."""
+    _current.section = name
+    _current.run_id = run_id
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record("total", name, time.perf_counter() - start)
+        _current.section = None
+
+
+def active():
+    """True se há uma seção sendo medida nesta thread."""
+    return getattr(_current, "section", None) is not None
+
+
+def records(run_id=None):
+    """Retorna as medições do buffer (opcionalmente de um único rerun)."""
+    with _lock:
+        items = list(_records)
+    if run_id is not None:
+        items = [item for item in items if item["run"] == run_id]
+    return items
+
+
+def to_jsonl(items):
+    """Serializa as medições em JSON lines."""
+    return "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+
+
+def profile_call(func, *args, **kwargs):
+    """Executa func sob cProfile; retorna (resultado, dump .prof, resumo em texto)."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    profiler.create_stats()
+    # Mesmo formato de Profile.dump_stats, legível por pstats/snakeviz
+    dump = marshal.dumps(profiler.stats)
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(25)
+    return result, dump, summary.getvalue()
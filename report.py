@@ -0,0 +1,175 @@
+import io
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import content_hash
+from snapshot import collect, source_fingerprint
+
+# Processos dedicados à renderização de relatórios
+REPORT_WORKERS = 2
+# Quantidade de relatórios prontos mantidos em memória
+REPORT_CACHE_SIZE = 16
+
+
+def collect_report_data(classe_social, faixa_etaria, regiao):
+    """Filtros, indicadores macro e assinatura das fontes que definem o relatório.
+
+    Os dados e as figuras são montados no processo do pool, pelo mesmo
+    registro do snapshot; aqui só entra o que identifica o relatório.
+    """
+    from macro import macro_kpis
+
+    return {
+        "filtros": {
+            "classe_social": list(classe_social),
+            "faixa_etaria": list(faixa_etaria),
+            "regiao": regiao,
+        },
+        "macro": macro_kpis(),
+        "fontes": source_fingerprint(),
+    }
+
+
+def report_key(data):
+    """Chave do relatório: hash dos filtros, dos indicadores e das fontes."""
+    return content_hash(**data)
+
+
+def _write(pdf, height, text):
+    """Escreve um parágrafo e volta para a margem esquerda."""
+    # As fontes padrão do PDF só cobrem Latin-1
+    text = str(text).encode("latin-1", "replace").decode("latin-1")
+    pdf.multi_cell(0, height, text, new_x="LMARGIN", new_y="NEXT")
+
+
+def render_report(data):
+    """Gera o PDF completo (executado num processo do pool)."""
+    from fpdf import FPDF
+
+    filters = data["filtros"]
+    figures, values, sections = collect(filters)
+    kpis = dict(values["kpis"], **data["macro"])
+
+    pdf = FPDF(orientation="P", unit="mm", format="A4")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", "B", 18)
+    _write(pdf, 10, "Dashboard Pobishop - Análise de Mercado")
+    pdf.set_font("Helvetica", size=10)
+    _write(pdf, 6, f"Classe Social: {', '.join(filters['classe_social']) or 'Todas'}")
+    _write(pdf, 6, f"Faixa Etária: {filters['faixa_etaria'][0]} a {filters['faixa_etaria'][1]} anos")
+    _write(pdf, 6, f"Região: {filters['regiao']}")
+
+    pdf.ln(4)
+    pdf.set_font("Helvetica", "B", 14)
+    _write(pdf, 8, "KPIs")
+    pdf.set_font("Helvetica", size=11)
+    for name, value in kpis.items():
+        _write(pdf, 6, f"{name}: {value}")
+
+    pdf.ln(4)
+    pdf.set_font("Helvetica", "B", 14)
+    _write(pdf, 8, "Matriz SWOT")
+    titles = {"Forcas": "Forças", "Fraquezas": "Fraquezas",
+              "Oportunidades": "Oportunidades", "Ameacas": "Ameaças"}
+    for group, items in values["swot"].items():
+        pdf.set_font("Helvetica", "B", 11)
+        _write(pdf, 6, titles.get(group, group))
+        pdf.set_font("Helvetica", size=11)
+        for item in items:
+            _write(pdf, 6, f"- {item}")
+
+    # Duas figuras por página; a exportação de imagens usa o Chrome do kaleido
+    rendered, error = 0, None
+    for i, (name, fig) in enumerate(figures.items()):
+        if i % 2 == 0:
+            pdf.add_page()
+        pdf.set_font("Helvetica", "B", 12)
+        _write(pdf, 7, f"{sections[name]} - {fig.layout.title.text or name}")
+        try:
+            image = fig.to_image(format="png", width=1000, height=520)
+        except Exception as exc:
+            error = str(exc).strip().splitlines()[0]
+            pdf.set_font("Helvetica", "I", 10)
+            _write(pdf, 6, f"Figura indisponível: {error}")
+            pdf.ln(100)
+            continue
+        pdf.image(io.BytesIO(image), w=180)
+        rendered += 1
+
+    # Sem nenhuma figura, o relatório é só texto: vira erro em vez de "pronto"
+    if figures and rendered == 0:
+        raise RuntimeError(f"Nenhuma figura pôde ser exportada ({error})")
+    return bytes(pdf.output())
+
+
+class ReportManager:
+    """Agenda relatórios num pool de processos e guarda os prontos por hash."""
+
+    def __init__(self, max_workers=REPORT_WORKERS, cache_size=REPORT_CACHE_SIZE):
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._executor = None
+        self._pending = {}
+        self._done = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn: não herda as threads do servidor Streamlit
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, data):
+        """Agenda o relatório (se ainda não existe) e retorna sua chave."""
+        key = report_key(data)
+        with self._lock:
+            # Relatórios com erro podem ser reagendados
+            if key in self._pending or isinstance(self._done.get(key), bytes):
+                return key
+            future = self._get_executor().submit(render_report, data)
+            self._pending[key] = future
+        future.add_done_callback(lambda f, key=key: self._finish(key, f))
+        return key
+
+    def _finish(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled():
+                self._done[key] = RuntimeError("Relatório cancelado.")
+            else:
+                self._done[key] = future.exception() or future.result()
+            self._done.move_to_end(key)
+            while len(self._done) > self.cache_size:
+                self._done.popitem(last=False)
+
+    def status(self, key):
+        """Retorna "pronto", "erro", "gerando" ou "desconhecido"."""
+        with self._lock:
+            if key in self._pending:
+                return "gerando"
+            result = self._done.get(key)
+        if result is None:
+            return "desconhecido"
+        return "erro" if isinstance(result, BaseException) else "pronto"
+
+    def result(self, key):
+        """Retorna os bytes do PDF pronto (ou a exceção da geração)."""
+        with self._lock:
+            return self._done.get(key)
+
+    def shutdown(self):
+        """Encerra o pool de processos."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Gerenciador compartilhado pelas sessões do processo
+report_manager = ReportManager()
@@ -0,0 +1,162 @@
+"""Agregação incremental dos KPIs a partir do log de pedidos (append-only).
+
+Uso:
+    python sales.py [--log data/vendas/pedidos.csv] [--append 1000000 --mes 2025-09]
+
+O log é um CSV com cabeçalho Data,Pedido_ID,Valor ao qual novos pedidos são
+apenas acrescentados. O agregador guarda num checkpoint JSON a posição (em
+bytes) já processada, as somas e contagens totais e por mês; cada atualização
+lê só os bytes acrescentados desde o último checkpoint.
+"""
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+
+from eventlog import IncrementalAggregator, append_csv, shared_aggregator
+
+# Log de pedidos (o checkpoint do agregador fica ao lado)
+SALES_LOG = Path(os.environ.get("POBISHOP_SALES_LOG",
+                                Path(__file__).parent / "data" / "vendas" / "pedidos.csv"))
+# Meses da janela dos KPIs (faturamento e ticket dos últimos 12 meses)
+WINDOW_MONTHS = 12
+
+
+class SalesAggregator(IncrementalAggregator):
+    """Mantém somas e contagens do log de pedidos, processando só o que foi acrescentado."""
+
+    column_types = {"Data": "date32", "Valor": "float64"}
+
+    def initial_state(self):
+        return {"pedidos": 0, "valor": 0.0, "meses": {}}
+
+    def aggregate(self, table):
+        """Soma as linhas novas ao total e ao mês de cada pedido."""
+        import pyarrow.compute as pc
+
+        months = pc.add(pc.multiply(pc.year(table["Data"]), 100), pc.month(table["Data"]))
+        grouped = table.append_column("Mes", months).group_by("Mes").aggregate(
+            [("Valor", "sum"), ("Valor", "count")])
+
+        meses = self.state["meses"]
+        for mes, valor, pedidos in zip(grouped["Mes"].to_pylist(),
+                                       grouped["Valor_sum"].to_pylist(),
+                                       grouped["Valor_count"].to_pylist()):
+            key = f"{mes // 100:04d}-{mes % 100:02d}"
+            total = meses.setdefault(key, [0.0, 0])
+            total[0] += valor
+            total[1] += pedidos
+        self.state["pedidos"] += table.num_rows
+        self.state["valor"] += pc.sum(table["Valor"]).as_py() or 0.0
+
+    def monthly(self):
+        """Retorna (meses ordenados, faturamento, pedidos) por mês."""
+        with self._lock:
+            items = sorted(self.state["meses"].items())
+        months = [key for key, _ in items]
+        revenue = np.array([value for _, (value, _) in items], dtype=np.float64)
+        orders = np.array([count for _, (_, count) in items], dtype=np.int64)
+        return months, revenue, orders
+
+    def kpis(self):
+        """Faturamento, ticket médio e crescimento da janela de 12 meses mais recente."""
+        months, revenue, orders = self.monthly()
+        if not months:
+            return None
+        index = _month_index(months)
+        last = index[-1]
+        window = index > last - WINDOW_MONTHS
+        previous = (index <= last - WINDOW_MONTHS) & (index > last - 2 * WINDOW_MONTHS)
+
+        faturamento = revenue[window].sum()
+        pedidos = orders[window].sum()
+        faturamento_anterior = revenue[previous].sum()
+        return {
+            "faturamento": faturamento,
+            "pedidos": int(pedidos),
+            "ticket_medio": faturamento / pedidos if pedidos else 0.0,
+            "crescimento": (faturamento / faturamento_anterior - 1) if faturamento_anterior else None,
+            "ultimo_mes": months[-1],
+        }
+
+
+def _month_index(months):
+    """Converte meses "AAAA-MM" em índices inteiros consecutivos."""
+    return np.array([int(m[:4]) * 12 + int(m[5:7]) - 1 for m in months])
+
+
+def format_amount(value):
+    """Formata valores grandes como "R$ 235 Bilhões" ou "R$ 1,2 Milhões"."""
+    for size, unit in [(1e9, "Bilhões"), (1e6, "Milhões"), (1e3, "Mil")]:
+        if abs(value) >= size:
+            scaled = value / size
+            text = f"{scaled:.0f}" if abs(scaled) >= 100 else f"{scaled:.1f}".replace(".", ",")
+            return f"R$ {text} {unit}"
+    return f"R$ {value:.2f}".replace(".", ",")
+
+
+def format_kpis(summary):
+    """KPIs de mercado no formato exibido no dashboard."""
+    ticket = f"{summary['ticket_medio']:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    crescimento = summary["crescimento"]
+    return {
+        "Mercado Total": format_amount(summary["faturamento"]),
+        "Taxa de Crescimento": f"{crescimento * 100:.1f}%" if crescimento is not None else "-",
+        "Ticket Médio": f"R$ {ticket}",
+    }
+
+
+def get_aggregator(log_path=SALES_LOG):
+    """Agregador compartilhado pelas sessões do processo."""
+    return shared_aggregator(SalesAggregator, log_path)
+
+
+def sales_kpis(log_path=SALES_LOG):
+    """Atualiza o agregador com o que foi acrescentado ao log e retorna os KPIs.
+
+    Retorna None se o log de pedidos ainda não existe.
+    """
+    if not Path(log_path).exists():
+        return None
+    aggregator = get_aggregator(log_path)
+    aggregator.refresh()
+    summary = aggregator.kpis()
+    return format_kpis(summary) if summary else None
+
+
+def append_orders(log_path, n_rows, month, seed=None):
+    """Acrescenta pedidos sintéticos de um mês ao log (para testes e demonstrações)."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(f"{month}-01")
+    days = rng.integers(0, start.days_in_month, n_rows)
+    df = pd.DataFrame({
+        "Data": (start + pd.to_timedelta(np.sort(days), unit="D")).strftime("%Y-%m-%d"),
+        "Pedido_ID": rng.integers(0, 2**62, n_rows),
+        "Valor": np.round(rng.lognormal(np.log(430), 0.5, n_rows), 2),
+    })
+    append_csv(log_path, df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", type=Path, default=SALES_LOG)
+    parser.add_argument("--append", type=int, default=0,
+                        help="acrescenta N pedidos sintéticos antes de atualizar")
+    parser.add_argument("--mes", default="2025-01", help="mês (AAAA-MM) dos pedidos sintéticos")
+    args = parser.parse_args()
+
+    if args.append:
+        append_orders(args.log, args.append, args.mes)
+    aggregator = SalesAggregator(args.log)
+    print(f"{aggregator.refresh()} pedidos novos processados")
+    summary = aggregator.kpis()
+    if summary:
+        for name, value in format_kpis(summary).items():
+            print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+from cache import cached_loader
+from leadtime import RELATIVE_ACCURACY, QuantileSketch
+
+# Percentis exibidos nas faixas do fan chart
+PERCENTILES = (5, 25, 50, 75, 95)
+# Caminhos simulados por bloco (limita a memória a ~bloco x meses floats)
+CHUNK_PATHS = 100_000
+# Simulações mantidas em cache (as premissas são livres, então o cache é limitado)
+SIMULATION_CACHE_ENTRIES = 32
+# Premissas iniciais da aba de Finanças (percentuais como nos controles do app)
+DEFAULT_PREMISES = {
+    "n_paths": 250_000,
+    "custo_fixo": 3530.0,
+    "custo_variavel": 60,
+    "volatilidade_custo": 5,
+    "volatilidade_nivel": 20,
+    "volatilidade_mensal": 10,
+}
+
+
+def monthly_revenue_base(receita_trimestral, months):
+    """Distribui a receita trimestral em meses e mantém o último nível depois do ano 1."""
+    base = np.repeat(np.asarray(receita_trimestral, dtype=np.float64) / 3, 3)
+    if months > len(base):
+        base = np.concatenate([base, np.full(months - len(base), base[-1])])
+    return base[:months]
+
+
+def _simulate_chunk(rng, n_paths, base, custo_variavel, custo_fixo,
+                    volatilidade_nivel, volatilidade_mensal, volatilidade_custo):
+    """Gera um bloco de caminhos: receita e custos mensais (meses x caminhos).
+
+    Os meses ficam no primeiro eixo para que os percentis por mês
+    trabalhem sobre linhas contíguas.
+    """
+    months = len(base)
+    # Choque de nível por caminho + ruído mensal, ambos lognormais com média 1
+    level = rng.normal(-volatilidade_nivel ** 2 / 2, volatilidade_nivel, size=n_paths)
+    noise = rng.normal(-volatilidade_mensal ** 2 / 2, volatilidade_mensal, size=(months, n_paths))
+    noise += level
+    receita = base[:, None] * np.exp(noise, out=noise)
+    ratio = np.clip(rng.normal(custo_variavel, volatilidade_custo, size=n_paths), 0, 1)
+    custos = receita * ratio + custo_fixo
+    return receita, custos
+
+
+class SignedSketch:
+    """Quantis de valores com sinal: um QuantileSketch para cada lado do zero.
+
+    Como os sketches de leadtime.py, se acumula bloco a bloco com memória
+    fixa e estima os quantis de todos os valores com erro relativo limitado.
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.positive = QuantileSketch(relative_accuracy)
+        self.negative = QuantileSketch(relative_accuracy)
+
+    def add(self, values):
+        negative = values < 0
+        self.positive.add(values[~negative])
+        self.negative.add(-values[negative])
+
+    def quantile(self, q):
+        """Valor estimado do quantil q (0 a 1) do conjunto de todos os valores."""
+        n_negative = self.negative.count
+        n_positive = self.positive.count
+        rank = q * (n_negative + n_positive - 1)
+        if rank < n_negative:
+            # Entre os negativos, a ordem dos módulos é a inversa
+            return -self.negative.quantile((n_negative - 1 - rank) / max(n_negative - 1, 1))
+        return self.positive.quantile((rank - n_negative) / max(n_positive - 1, 1))
+
+    def percentiles(self):
+        """Valores dos PERCENTILES."""
+        return np.array([self.quantile(p / 100) for p in PERCENTILES])
+
+
+@cached_loader(ttl=60 * 60, max_entries=SIMULATION_CACHE_ENTRIES)
+def simulate_break_even(receita_trimestral, custo_variavel=0.6, custo_fixo=3530.0,
+                        volatilidade_nivel=0.2, volatilidade_mensal=0.1,
+                        volatilidade_custo=0.05, n_paths=1_000_000, months=24,
+                        chunk_paths=CHUNK_PATHS, seed=7):
+    """Simula caminhos de receita/custos e a distribuição do ponto de equilíbrio.
+
+    O ponto de equilíbrio é o mês a partir do qual o resultado operacional
+    acumulado não volta a ficar negativo. Os caminhos são gerados em blocos e
+    acumulados em sketches de quantis por mês (SignedSketch), então a memória
+    não cresce com n_paths e os percentis são os de todos os caminhos, com
+    erro relativo de até RELATIVE_ACCURACY. O resultado fica em cache por conjunto
+    de parâmetros (os argumentos precisam ser hasheáveis), até uma hora e
+    para os SIMULATION_CACHE_ENTRIES conjuntos usados mais recentemente.
+    """
+    rng = np.random.default_rng(seed)
+    base = monthly_revenue_base(receita_trimestral, months)
+
+    # Índice 0 = mês 1; o último índice conta os caminhos que não se pagam
+    break_even_counts = np.zeros(months + 1, dtype=np.int64)
+    band_sketches = {
+        "receita": [SignedSketch() for _ in range(months)],
+        "resultado_acumulado": [SignedSketch() for _ in range(months)],
+    }
+    year1_sums = {"receita": 0.0, "custos": 0.0}
+    year1_result = SignedSketch()
+
+    done = 0
+    while done < n_paths:
+        size = min(chunk_paths, n_paths - done)
+        receita, custos = _simulate_chunk(
+            rng, size, base, custo_variavel, custo_fixo,
+            volatilidade_nivel, volatilidade_mensal, volatilidade_custo
+        )
+        acumulado = np.cumsum(receita - custos, axis=0)
+
+        # Equilíbrio sustentado: mês seguinte ao último acumulado negativo
+        negative = acumulado < 0
+        last_negative = np.where(negative.any(axis=0),
+                                 months - 1 - negative[::-1].argmax(axis=0), -1)
+        break_even_counts += np.bincount(last_negative + 1, minlength=months + 1)
+
+        for month in range(months):
+            band_sketches["receita"][month].add(receita[month])
+            band_sketches["resultado_acumulado"][month].add(acumulado[month])
+
+        months_year1 = min(12, months)
+        receita_ano1 = receita[:months_year1].sum(axis=0)
+        custos_ano1 = custos[:months_year1].sum(axis=0)
+        year1_sums["receita"] += receita_ano1.sum()
+        year1_sums["custos"] += custos_ano1.sum()
+        year1_result.add(receita_ano1 - custos_ano1)
+        done += size
+
+    meses = np.arange(1, months + 1)
+    bands = {}
+    for name, sketches in band_sketches.items():
+        values = np.array([sketch.percentiles() for sketch in sketches])
+        bands[name] = pd.DataFrame(
+            {"Mes": meses, **{f"P{p}": values[:, i] for i, p in enumerate(PERCENTILES)}}
+        )
+    df_break_even = pd.DataFrame({
+        "Mes": list(meses) + ["Não atingido"],
+        "Probabilidade": break_even_counts / n_paths,
+    })
+    cumulative = np.cumsum(break_even_counts[:-1]) / n_paths
+
+    def month_at(quantile):
+        # Mês em que a probabilidade acumulada alcança o quantil (None se nunca)
+        index = np.searchsorted(cumulative, quantile)
+        return int(meses[index]) if index < months else None
+
+    return {
+        "n_paths": n_paths,
+        "receita_ano1": year1_sums["receita"] / n_paths,
+        "custos_ano1": year1_sums["custos"] / n_paths,
+        "resultado_ano1": (year1_sums["receita"] - year1_sums["custos"]) / n_paths,
+        "resultado_ano1_percentis": dict(zip(PERCENTILES, year1_result.percentiles())),
+        "break_even": df_break_even,
+        "break_even_p25": month_at(0.25),
+        "break_even_p50": month_at(0.50),
+        "break_even_p75": month_at(0.75),
+        "faixas_receita": bands["receita"],
+        "faixas_resultado": bands["resultado_acumulado"],
+    }
+
+
+def simulate_premises(receita_trimestral, premises):
+    """Roda simulate_break_even com as premissas do app (percentuais viram frações)."""
+    return simulate_break_even(
+        tuple(receita_trimestral),
+        custo_variavel=premises["custo_variavel"] / 100,
+        custo_fixo=premises["custo_fixo"],
+        volatilidade_nivel=premises["volatilidade_nivel"] / 100,
+        volatilidade_mensal=premises["volatilidade_mensal"] / 100,
+        volatilidade_custo=premises["volatilidade_custo"] / 100,
+        n_paths=premises["n_paths"],
+    )
+
+
+def headline(simulation):
+    """Valores escalares da simulação exibidos no app (serializáveis em JSON)."""
+    return {
+        "n_paths": int(simulation["n_paths"]),
+        "receita_ano1": float(simulation["receita_ano1"]),
+        "custos_ano1": float(simulation["custos_ano1"]),
+        "resultado_ano1": float(simulation["resultado_ano1"]),
+        "resultado_ano1_percentis": {f"P{p}": float(value)
+                                     for p, value in simulation["resultado_ano1_percentis"].items()},
+        "break_even_p25": simulation["break_even_p25"],
+        "break_even_p75": simulation["break_even_p75"],
+        "meses": len(simulation["faixas_resultado"]),
+    }
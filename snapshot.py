@@ -0,0 +1,268 @@
+"""Snapshot das figuras e KPIs do dashboard nos filtros padrão.
+
+Uso (a cada atualização dos dados ou deploy):
+    python snapshot.py [--dir snapshots] [--keep 3]
+
+O build roda os loaders e os construtores de visualizations.py uma vez e
+grava snapshots/<versão>/ com manifest.json, valores.json e um JSON por
+figura; no fim, snapshots/CURRENT passa a apontar para a nova versão (troca
+atômica). O app serve do snapshot enquanto os arquivos de dados e o código
+forem os mesmos do build e os controles estiverem no padrão; sem snapshot
+válido, tudo é calculado ao vivo.
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+# Diretório das versões do snapshot (CURRENT aponta para a versão servida)
+SNAPSHOT_DIR = Path(os.environ.get("POBISHOP_SNAPSHOT_DIR", ROOT / "snapshots"))
+# Filtros da sidebar usados no snapshot (são também os valores iniciais do app)
+DEFAULT_FILTERS = {"classe_social": ["C", "D"], "faixa_etaria": [25, 35], "regiao": "Todas"}
+# Versões mantidas no diretório após um build
+KEEP_VERSIONS = 3
+# Intervalo (s) entre verificações de que as fontes do snapshot não mudaram
+FRESHNESS_INTERVAL = 30
+
+
+def source_fingerprint():
+    """Assinatura (mtime e tamanho) dos arquivos de dados e do código do dashboard."""
+    # Os módulos registram seus loaders; as origens de todos eles entram na assinatura
+    import filters, personas, spatial  # noqa: F401
+    from cache import source_files
+
+    files = source_files() + sorted(str(path) for path in ROOT.glob("*.py"))
+    return stat_files(files)
+
+
+def stat_files(files):
+    """Lista [caminho, [mtime_ns, tamanho]] (ou [caminho, None] se não existe)."""
+    fingerprint = []
+    for path in files:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            fingerprint.append([path, None])
+        else:
+            fingerprint.append([path, [stat.st_mtime_ns, stat.st_size]])
+    return fingerprint
+
+
+class Snapshot:
+    """Uma versão gravada do snapshot: valores em memória, figuras lidas sob demanda."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / "manifest.json").read_text())
+        self.values = json.loads((self.path / "valores.json").read_text())
+        self._figures = {}
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._fresh = False
+
+    @property
+    def version(self):
+        return self.path.name
+
+    def is_fresh(self):
+        """True se dados e código ainda são os mesmos do build.
+
+        Só consulta o disco a cada FRESHNESS_INTERVAL segundos, e apenas os
+        arquivos listados no manifest (sem importar data_loader e pandas).
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < FRESHNESS_INTERVAL:
+                return self._fresh
+            files = [path for path, _ in self.manifest["fontes"]]
+            self._fresh = self.manifest["fontes"] == stat_files(files)
+            self._checked_at = now
+            return self._fresh
+
+    def matches(self, classe_social, faixa_etaria, regiao):
+        """True se os filtros da sidebar são os usados no build."""
+        filters = self.manifest["filtros"]
+        return (list(classe_social) == filters["classe_social"]
+                and list(faixa_etaria) == filters["faixa_etaria"]
+                and regiao == filters["regiao"])
+
+    def figure(self, name):
+        """Figura `name` do snapshot (None se não foi gravada)."""
+        import plotly.graph_objects as go
+
+        with self._lock:
+            payload = self._figures.get(name)
+            if payload is None:
+                path = self.path / "figuras" / f"{name}.json"
+                if not path.exists():
+                    return None
+                payload = self._figures[name] = path.read_text()
+        return go.Figure(json.loads(payload), _validate=False)
+
+    def value(self, name):
+        """Cópia do valor `name` (KPIs, contagens) gravado no snapshot."""
+        return copy.deepcopy(self.values.get(name))
+
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def current_snapshot(directory=SNAPSHOT_DIR):
+    """Snapshot apontado por CURRENT, se existir e ainda corresponder às fontes."""
+    global _current
+    directory = Path(directory)
+    try:
+        version = (directory / "CURRENT").read_text().strip()
+    except OSError:
+        return None
+    with _current_lock:
+        if _current is None or _current.path != directory / version:
+            try:
+                _current = Snapshot(directory / version)
+            except (OSError, ValueError):
+                return None
+        snapshot = _current
+    return snapshot if snapshot.is_fresh() else None
+
+
+def collect(filters=DEFAULT_FILTERS):
+    """Calcula as figuras e os valores servidos pelo snapshot (nome -> figura/valor).
+
+    É o registro de todas as figuras do dashboard, na ordem das abas: também
+    monta o relatório PDF. Retorna (figuras, valores, seções), com a aba de
+    cada figura em `seções`.
+    """
+    import data_loader
+    import visualizations as viz
+    from filters import load_audience_cube
+    from personas import load_persona_assignment
+    from simulations import DEFAULT_PREMISES, headline, simulate_premises
+    from spatial import load_competitive_positioning
+
+    figures, values, sections = {}, {}, {}
+
+    def add(section, name, fig):
+        figures[name] = fig
+        sections[name] = section
+
+    df_geo, df_growth, kpis = data_loader.load_market_overview_data()
+    values["kpis"] = kpis
+    add("Visão Geral", "regioes", viz.create_region_map(df_geo))
+    add("Visão Geral", "crescimento", viz.create_growth_chart(df_growth))
+
+    _, _, df_behavior, _ = data_loader.load_target_audience_data()
+    cube = load_audience_cube()
+    df_demo, df_income, df_region, total = cube.summarize(
+        filters["classe_social"], tuple(filters["faixa_etaria"]), filters["regiao"])
+    values["publico"] = {"total": total, "clientes": cube.n_rows}
+    add("Público-Alvo", "piramide", viz.create_age_pyramid(df_demo))
+    add("Público-Alvo", "renda", viz.create_income_chart(df_income))
+    add("Público-Alvo", "publico_regioes", viz.create_region_map(df_region))
+    assignment = load_persona_assignment()
+    df_profiles = assignment.profiles()
+    add("Público-Alvo", "radar", viz.create_persona_radar(df_profiles) if len(df_profiles)
+        else viz.create_behavior_radar(df_behavior))
+    values["personas"] = assignment.summary().to_dict("records")
+
+    df_positions, pobishop = load_competitive_positioning()
+    add("Competitivo", "mapa_concorrentes", viz.create_competitor_map(df_positions, pobishop))
+    add("Competitivo", "market_share", viz.create_market_share(data_loader.load_competitive_data()))
+
+    df_products = data_loader.load_products_data()
+    add("Produtos", "treemap", viz.create_product_treemap(df_products, top_n=viz.HIERARCHY_TOP_N))
+    add("Produtos", "preco_demanda", viz.create_price_demand(df_products))
+
+    df_revenue, df_investment = data_loader.load_financial_data()
+    add("Finanças", "receita", viz.create_revenue_chart(df_revenue))
+    add("Finanças", "investimento", viz.create_investment_chart(df_investment))
+    simulation = simulate_premises(df_revenue["Receita"].tolist(), DEFAULT_PREMISES)
+    values["simulacao"] = headline(simulation)
+    add("Finanças", "resultado_simulado", viz.create_fan_chart(
+        simulation["faixas_resultado"], "Resultado Operacional Acumulado", "Resultado (R$)"))
+    add("Finanças", "break_even", viz.create_break_even_chart(simulation["break_even"]))
+    add("Finanças", "receita_simulada", viz.create_fan_chart(
+        simulation["faixas_receita"], "Receita Mensal Simulada", "Receita (R$)"))
+
+    swot, df_risk = data_loader.load_swot_data()
+    values["swot"] = swot
+    add("SWOT", "riscos", viz.create_risk_heatmap(df_risk))
+
+    df_suppliers = data_loader.load_supplier_data()
+    add("Fornecedores", "prazos", viz.create_supplier_chart(df_suppliers))
+    add("Fornecedores", "fluxo", viz.create_product_flow(df_suppliers, top_n=viz.HIERARCHY_TOP_N))
+
+    return figures, values, sections
+
+
+def _json_default(value):
+    # Escalares do NumPy (contagens, médias) viram números do Python
+    return value.item()
+
+
+def build(directory=SNAPSHOT_DIR, keep=KEEP_VERSIONS):
+    """Grava uma nova versão do snapshot e aponta CURRENT para ela; retorna o caminho."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    fingerprint = source_fingerprint()
+    figures, values, _ = collect()
+
+    payloads = {name: fig.to_json() for name, fig in figures.items()}
+    values_json = json.dumps(values, ensure_ascii=False, default=_json_default)
+    digest = hashlib.sha1(values_json.encode())
+    for name in sorted(payloads):
+        digest.update(name.encode())
+        digest.update(payloads[name].encode())
+    version = time.strftime("%Y%m%d-%H%M%S") + "-" + digest.hexdigest()[:8]
+
+    # Grava num diretório temporário e renomeia: o app nunca vê uma versão pela metade
+    staging = directory / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    (staging / "figuras").mkdir(parents=True)
+    for name, payload in payloads.items():
+        (staging / "figuras" / f"{name}.json").write_text(payload)
+    (staging / "valores.json").write_text(values_json)
+    (staging / "manifest.json").write_text(json.dumps({
+        "versao": version,
+        "criado_em": time.time(),
+        "filtros": DEFAULT_FILTERS,
+        "figuras": sorted(payloads),
+        "fontes": fingerprint,
+    }, ensure_ascii=False, indent=2))
+    os.replace(staging, directory / version)
+
+    pointer = directory / "CURRENT.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, directory / "CURRENT")
+
+    versions = sorted(path for path in directory.iterdir()
+                      if path.is_dir() and not path.name.startswith("."))
+    for old in versions[:-keep] if keep > 0 else []:
+        if old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+    return directory / version
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=SNAPSHOT_DIR)
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS,
+                        help="versões mantidas no diretório")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = build(args.dir, args.keep)
+    size = sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+    figures = len(list((path / "figuras").glob("*.json")))
+    print(f"Snapshot {path.name}: {figures} figuras, {size / 1024:.0f} KB "
+          f"em {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
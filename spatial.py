@@ -0,0 +1,169 @@
+import numpy as np
+
+from cache import cached_loader
+from data_loader import _sources, load_competitive_data, load_competitor_catalog, load_products_data
+
+# Pontos por célula visados ao escolher a resolução da grade
+POINTS_PER_CELL = 32
+# Limite de células por eixo
+MAX_GRID_BINS = 512
+
+
+class GridIndex:
+    """Índice espacial em grade regular sobre pontos 2D.
+
+    Os pontos ficam ordenados por célula (linha = célula em x, coluna =
+    célula em y) com o início de cada célula num vetor de offsets, então
+    os pontos de um bloco de células são fatias contíguas. Vizinhos mais
+    próximos e contagens por região só olham as células que podem conter
+    a resposta, em vez de comparar com todos os pontos.
+    """
+
+    def __init__(self, x, y, scale=(1.0, 1.0), bins=None):
+        x = np.asarray(x, dtype=np.float64) / scale[0]
+        y = np.asarray(y, dtype=np.float64) / scale[1]
+        self.scale = scale
+        self.n_points = len(x)
+        if bins is None:
+            bins = int(np.clip(np.sqrt(max(self.n_points, 1) / POINTS_PER_CELL), 1, MAX_GRID_BINS))
+        self.bins = bins
+
+        self.low = np.array([x.min(), y.min()]) if self.n_points else np.zeros(2)
+        high = np.array([x.max(), y.max()]) if self.n_points else np.ones(2)
+        self.cell_size = np.where(high > self.low, (high - self.low) / bins, 1.0)
+
+        cx, cy = self._cells(x, y)
+        cells = cx * bins + cy
+        self.order = np.argsort(cells, kind="stable")
+        self.x = x[self.order]
+        self.y = y[self.order]
+        self.offsets = np.searchsorted(cells[self.order], np.arange(bins * bins + 1))
+
+    def _cells(self, x, y):
+        cx = np.clip(((x - self.low[0]) / self.cell_size[0]).astype(np.int64), 0, self.bins - 1)
+        cy = np.clip(((y - self.low[1]) / self.cell_size[1]).astype(np.int64), 0, self.bins - 1)
+        return cx, cy
+
+    def _block(self, cx0, cx1, cy0, cy1):
+        """Posições (na ordem do índice) dos pontos nas células [cx0..cx1] x [cy0..cy1]."""
+        cx0, cy0 = max(cx0, 0), max(cy0, 0)
+        cx1, cy1 = min(cx1, self.bins - 1), min(cy1, self.bins - 1)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.arange(cx0, cx1 + 1) * self.bins
+        starts = self.offsets[rows + cy0]
+        stops = self.offsets[rows + cy1 + 1]
+        lengths = stops - starts
+        if lengths.sum() == 0:
+            return np.zeros(0, dtype=np.int64)
+        # Concatena as fatias contíguas de cada coluna de células sem laço em Python
+        shifts = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return np.arange(lengths.sum()) + shifts
+
+    def nearest(self, x, y, k=10):
+        """Retorna (posições originais, distâncias) dos k pontos mais próximos de (x, y).
+
+        Distâncias na escala normalizada (coordenadas divididas por `scale`).
+        """
+        k = min(k, self.n_points)
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        qx, qy = x / self.scale[0], y / self.scale[1]
+        cx, cy = (int(c[0]) for c in self._cells(np.array([qx]), np.array([qy])))
+
+        # Amplia o anel de células até que nenhum ponto fora dele possa estar mais perto
+        radius = 0
+        while True:
+            block = self._block(cx - radius, cx + radius, cy - radius, cy + radius)
+            if len(block) >= k:
+                distances = np.hypot(self.x[block] - qx, self.y[block] - qy)
+                kth = np.partition(distances, k - 1)[k - 1]
+                if kth <= radius * self.cell_size.min():
+                    break
+            if radius >= self.bins:
+                block = np.arange(self.n_points)
+                distances = np.hypot(self.x - qx, self.y - qy)
+                break
+            radius += 1
+
+        best = np.argpartition(distances, k - 1)[:k]
+        best = best[np.argsort(distances[best])]
+        return self.order[block[best]], distances[best]
+
+    def count_in_box(self, x0, x1, y0, y1):
+        """Quantidade de pontos com x0 <= x <= x1 e y0 <= y <= y1 (coordenadas originais)."""
+        x0, x1 = x0 / self.scale[0], x1 / self.scale[0]
+        y0, y1 = y0 / self.scale[1], y1 / self.scale[1]
+        (cx0, cx1), (cy0, cy1) = self._cells(np.array([x0, x1]), np.array([y0, y1]))
+        block = self._block(int(cx0), int(cx1), int(cy0), int(cy1))
+        xs, ys = self.x[block], self.y[block]
+        return int(np.count_nonzero((xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1)))
+
+
+class CatalogIndex:
+    """Um GridIndex de preço x qualidade por categoria do catálogo de SKUs.
+
+    Preço e qualidade são normalizados pelo desvio padrão do catálogo para
+    que a distância não seja dominada pela coluna de maior escala.
+    """
+
+    def __init__(self, df_catalog):
+        self.df = df_catalog
+        self.scale = (float(df_catalog["Preco"].std() or 1.0),
+                      float(df_catalog["Qualidade"].std() or 1.0))
+        self.categories = {}
+        groups = df_catalog.groupby("Categoria", observed=True, sort=True).indices
+        for category, positions in groups.items():
+            rows = df_catalog.iloc[positions]
+            self.categories[category] = (positions, GridIndex(rows["Preco"], rows["Qualidade"],
+                                                              scale=self.scale))
+
+    def nearest(self, category, preco, qualidade, k=10):
+        """SKUs concorrentes mais próximos de um produto, na mesma categoria."""
+        if category not in self.categories:
+            return self.df.iloc[0:0].assign(Distancia=[])
+        positions, index = self.categories[category]
+        found, distances = index.nearest(preco, qualidade, k)
+        return self.df.iloc[positions[found]].assign(Distancia=distances)
+
+    def count_in_box(self, category, preco, qualidade):
+        """SKUs da categoria dentro das faixas (mínimo, máximo) de preço e qualidade."""
+        if category not in self.categories:
+            return 0
+        _, index = self.categories[category]
+        return index.count_in_box(preco[0], preco[1], qualidade[0], qualidade[1])
+
+
+def positioning(df_catalog, df_competitors, df_products):
+    """Posição de cada concorrente (mediana do catálogo) e da Pobishop (produtos).
+
+    Só entram SKUs das categorias em que a Pobishop atua. A posição da
+    Pobishop é a média dos produtos ponderada pela demanda.
+    """
+    categories = df_products["Categoria"].astype(str).unique()
+    comparable = df_catalog[df_catalog["Categoria"].astype(str).isin(categories)]
+    df_positions = (comparable.groupby("Concorrente", observed=True)
+                    .agg(Preco=("Preco", "median"), Qualidade=("Qualidade", "mean"),
+                         SKUs=("Preco", "size"))
+                    .reset_index())
+    df_positions["Concorrente"] = df_positions["Concorrente"].astype(str)
+    df_positions = df_positions.merge(df_competitors[["Concorrente", "Market_Share"]],
+                                      on="Concorrente", how="left")
+
+    weights = df_products["Demanda"].to_numpy(dtype=np.float64)
+    pobishop = (float(np.average(df_products["Preco"], weights=weights)),
+                float(np.average(df_products["Qualidade"], weights=weights)))
+    return df_positions, pobishop
+
+
+@cached_loader(ttl=60 * 60, sources=_sources("catalogo_concorrentes"))
+def load_catalog_index():
+    """Carrega o catálogo de SKUs concorrentes com o índice espacial já construído."""
+    return CatalogIndex(load_competitor_catalog())
+
+
+@cached_loader(ttl=60 * 60,
+               sources=_sources("catalogo_concorrentes", "concorrentes", "produtos"))
+def load_competitive_positioning():
+    """Carrega as posições dos concorrentes e da Pobishop (ver positioning)."""
+    return positioning(load_competitor_catalog(), load_competitive_data(), load_products_data())
@@ -1,7 +1,200 @@
-import plotly.express as px
+import json
+import math
+import time
+from functools import wraps
+
+import numpy as np
 import plotly.graph_objects as go
 import pandas as pd
 
+from cache import content_hash, figure_cache
+from lazy import lazy_import
+from profiling import record
+
+# plotly.express só é carregado na primeira figura que não está em cache
+px = lazy_import("plotly.express")
+
+
+def memoize_figure(func):
+    """Memoiza uma função create_* pelo hash do conteúdo dos argumentos.
+
+    A figura é guardada como JSON; num acerto ela é reconstruída sem
+    passar de novo pelo plotly.express nem pela validação de propriedades.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        key = func.__name__ + ":" + content_hash(*args, **kwargs)
+        payload = figure_cache.get(key)
+        if payload is not None:
+            fig = go.Figure(json.loads(payload), _validate=False)
+            record("figura", func.__name__, time.perf_counter() - start, cached=True)
+            return fig
+        fig = func(*args, **kwargs)
+        figure_cache.put(key, fig.to_json().encode())
+        record("figura", func.__name__, time.perf_counter() - start, cached=False)
+        return fig
+    return wrapper
+
+def _nice_step(raw_step):
+    """Arredonda um passo de eixo para 1, 2 ou 5 vezes uma potência de 10."""
+    magnitude = 10 ** math.floor(math.log10(raw_step)) if raw_step > 0 else 1
+    for factor in (1, 2, 5, 10):
+        if raw_step <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
+
+# Acima deste número de pontos os scatters usam WebGL e agregação no servidor
+LARGE_DATA_THRESHOLD = 1_000
+# Resolução da grade de agregação (no máximo GRID_BINS² pontos enviados)
+GRID_BINS = 60
+# Quantidade de pontos rotulados no modo de dados grandes
+LABEL_TOP_N = 15
+
+def bin_points(df, x, y, weight, bins=GRID_BINS):
+    """Agrega pontos sobrepostos numa grade regular.
+
+    Retorna um DataFrame com a posição média, a quantidade de pontos e a
+    soma dos pesos de cada célula ocupada (pesos nulos contam como zero).
+    """
+    xs = df[x].to_numpy(dtype=np.float64)
+    ys = df[y].to_numpy(dtype=np.float64)
+    weights = df[weight].to_numpy(dtype=np.float64)
+    weights = np.where(np.isnan(weights), 0.0, weights)
+    
+    def cell_index(values):
+        low, high = np.nanmin(values), np.nanmax(values)
+        span = high - low if high > low else 1.0
+        return np.clip(((values - low) / span * bins).astype(np.int64), 0, bins - 1)
+    
+    cells = cell_index(xs) * bins + cell_index(ys)
+    occupied, inverse = np.unique(cells, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(occupied))
+    return pd.DataFrame({
+        x: np.bincount(inverse, weights=xs, minlength=len(occupied)) / counts,
+        y: np.bincount(inverse, weights=ys, minlength=len(occupied)) / counts,
+        "Pontos": counts,
+        weight: np.bincount(inverse, weights=weights, minlength=len(occupied))
+    })
+
+# Filhos mantidos por nó nos treemaps/sunbursts (o resto vira "Outros")
+HIERARCHY_TOP_N = 10
+# Filhos mantidos ao detalhar um único nó
+DRILL_TOP_N = 50
+OTHERS_LABEL = "Outros"
+
+def aggregate_hierarchy(df, path, value, color=None, top_n=HIERARCHY_TOP_N, focus=()):
+    """Agrega uma hierarquia em nós (id, pai, rótulo, valor, cor) para treemap/sunburst.
+
+    Em cada nível ficam os `top_n` filhos de maior valor de cada pai; os
+    demais são somados num nó "Outros", que não é aberto. Os totais dos pais
+    saem de somas agrupadas, e a cor de cada nó é a média de `color`
+    ponderada por `value` (como no plotly.express). `focus` traz os valores
+    dos primeiros níveis do ramo detalhado: ele vira a raiz e só os níveis
+    abaixo dele são agregados.
+    """
+    focus = tuple(focus)
+    for column, key in zip(path, focus):
+        df = df[df[column].astype(str) == str(key)]
+    root = "/".join(map(str, focus))
+
+    values = df[value].to_numpy(dtype=np.float64)
+    weighted = values * (df[color].to_numpy(dtype=np.float64) if color else 0.0)
+    nodes = []
+    if focus:
+        nodes.append(pd.DataFrame({"id": [root], "parent": [""], "label": [str(focus[-1])],
+                                   "value": [values.sum()], "weighted": [weighted.sum()],
+                                   "count": [len(values)]}))
+
+    # Linhas ainda abertas e o pai (posição em parent_ids) de cada uma
+    rows = np.arange(len(df))
+    parents = np.zeros(len(df), dtype=np.int64)
+    parent_ids = np.array([root], dtype=object)
+    levels = path[len(focus):]
+    for depth, column in enumerate(levels):
+        codes, uniques = pd.factorize(df[column].to_numpy()[rows])
+        keys = parents * len(uniques) + codes
+        groups = (pd.DataFrame({"key": keys, "value": values[rows], "weighted": weighted[rows]})
+                  .groupby("key", sort=False)
+                  .agg(value=("value", "sum"), weighted=("weighted", "sum"), count=("value", "size"))
+                  .reset_index())
+        groups["parent"] = groups["key"] // len(uniques)
+        groups = groups.sort_values(["parent", "value"], ascending=[True, False], kind="stable")
+        kept = groups.groupby("parent", sort=False).cumcount().to_numpy() < top_n
+
+        df_kept = groups[kept]
+        labels = np.asarray(uniques, dtype=object)[df_kept["key"] % len(uniques)].astype(str)
+        df_kept = df_kept.assign(parent=parent_ids[df_kept["parent"]], label=labels)
+        df_kept["id"] = df_kept["parent"] + "/" + df_kept["label"]
+
+        df_others = (groups[~kept].groupby("parent", sort=False)[["value", "weighted", "count"]]
+                     .sum()
+                     .reset_index())
+        df_others["parent"] = parent_ids[df_others["parent"]]
+        df_others["id"] = df_others["parent"] + "/" + OTHERS_LABEL
+        df_others["label"] = OTHERS_LABEL + " (" + df_others["count"].astype(str) + ")"
+        nodes.extend([df_kept, df_others])
+
+        if depth == len(levels) - 1 or len(df_kept) == 0:
+            break
+        # Só as linhas dos filhos mantidos descem para o próximo nível
+        kept_keys = df_kept["key"].to_numpy()
+        order = np.argsort(kept_keys)
+        position = np.minimum(np.searchsorted(kept_keys[order], keys), len(kept_keys) - 1)
+        is_kept = kept_keys[order][position] == keys
+        rows, parents = rows[is_kept], order[position[is_kept]]
+        parent_ids = df_kept["id"].to_numpy()
+
+    df_nodes = pd.concat(nodes, ignore_index=True)
+    df_nodes["color"] = (df_nodes["weighted"] / df_nodes["value"].where(df_nodes["value"] != 0)
+                         if color else np.nan)
+    return df_nodes[["id", "parent", "label", "value", "color", "count"]].rename(
+        columns={"count": "itens"})
+
+def _hierarchy_trace(trace, df_nodes, value, color, **marker):
+    """Treemap ou sunburst com os nós de aggregate_hierarchy."""
+    return trace(
+        ids=df_nodes["id"], parents=df_nodes["parent"], labels=df_nodes["label"],
+        values=df_nodes["value"], branchvalues="total",
+        marker=dict(colors=df_nodes["color"], showscale=True, **marker),
+        customdata=df_nodes["itens"],
+        hovertemplate=(f"%{{label}}<br>{value}: %{{value:,.0f}}<br>{color}: %{{color:.1f}}"
+                       "<br>Itens: %{customdata}<extra></extra>")
+    )
+
+def _large_scatter(df, x, y, weight, label, title, label_top_n):
+    """Scatter em WebGL com densidade agregada e rótulos só para o top-N."""
+    df_bins = bin_points(df, x, y, weight)
+    # Pesos negativos ou nulos (ex.: margem negativa) não aumentam o marcador;
+    # sem nenhum peso positivo, todos ficam com o mesmo tamanho
+    weights = df_bins[weight].clip(lower=0).fillna(0).to_numpy(dtype=np.float64)
+    max_weight = weights.max(initial=0)
+    size = np.sqrt(weights / max_weight) * 30 + 4 if max_weight > 0 else np.full(len(weights), 10.0)
+    
+    fig = go.Figure(go.Scattergl(
+        x=df_bins[x], y=df_bins[y],
+        mode="markers",
+        marker=dict(size=size, color=df_bins["Pontos"], colorscale="Blues",
+                    showscale=True, colorbar=dict(title="Pontos"), opacity=0.7),
+        customdata=np.stack([df_bins["Pontos"], df_bins[weight]], axis=-1),
+        hovertemplate=(f"{x}: %{{x:.1f}}<br>{y}: %{{y:.1f}}<br>"
+                       f"Pontos: %{{customdata[0]}}<br>{weight}: %{{customdata[1]:.1f}}<extra></extra>"),
+        name=f"Densidade ({len(df):,} pontos)".replace(",", ".")
+    ))
+    
+    top = df.nlargest(label_top_n, weight)
+    fig.add_trace(go.Scattergl(
+        x=top[x], y=top[y],
+        mode="markers+text",
+        text=top[label],
+        textposition="top center",
+        marker=dict(size=6, color="black"),
+        name=f"Top {label_top_n} por {weight}"
+    ))
+    fig.update_layout(title=title)
+    return fig
+
+@memoize_figure
 def create_region_map(df_geo):
     """Cria mapa de calor para distribuição do público por região."""
     # Como não temos um mapa do Brasil pronto no Plotly,
@@ -13,6 +206,7 @@ def create_region_map(df_geo):
                      yaxis_title="Potencial de Público")
     return fig
 
+@memoize_figure
 def create_growth_chart(df_growth):
     """Cria gráfico de tendência de crescimento."""
     fig = px.line(df_growth, x="Ano", y="Faturamento", 
@@ -22,10 +216,16 @@ def create_growth_chart(df_growth):
                      yaxis_title="Faturamento (R$ bilhões)")
     return fig
 
+@memoize_figure
 def create_age_pyramid(df_demo):
     """Cria pirâmide demográfica."""
     fig = go.Figure()
     
+    # Marcas simétricas do eixo a partir do maior valor
+    max_value = max(df_demo["Masculino"].max(), df_demo["Feminino"].max(), 1)
+    step = _nice_step(max_value / 4)
+    ticks = [int(step * i) for i in range(int(max_value // step) + 2)]
+    
     # Masculino (valores negativos para pirâmide)
     fig.add_trace(go.Bar(
         y=df_demo["Faixa_Etaria"],
@@ -50,13 +250,14 @@ def create_age_pyramid(df_demo):
         bargap=0.1,
         xaxis=dict(
             title="População",
-            tickvals=[-40, -30, -20, -10, 0, 10, 20, 30, 40],
-            ticktext=["40", "30", "20", "10", "0", "10", "20", "30", "40"]
+            tickvals=[-value for value in ticks[:0:-1]] + ticks,
+            ticktext=[f"{value:,}".replace(",", ".") for value in ticks[:0:-1] + ticks]
         )
     )
     
     return fig
 
+@memoize_figure
 def create_income_chart(df_income):
     """Cria gráfico de renda média por classe social."""
     fig = px.bar(df_income, x="Classe", y="Renda_Media",
@@ -66,6 +267,7 @@ def create_income_chart(df_income):
                      yaxis_title="Renda Média (R$)")
     return fig
 
+@memoize_figure
 def create_behavior_radar(df_behavior):
     """Cria radar chart para dores/comportamentos."""
     fig = px.line_polar(df_behavior, r="Pontuacao", 
@@ -74,26 +276,46 @@ def create_behavior_radar(df_behavior):
                        title="Perfil de Necessidades do Público-Alvo")
     return fig
 
-def create_competitor_map(df_competitors):
-    """Cria mapa de posicionamento dos concorrentes."""
-    fig = px.scatter(df_competitors, x="Preco", y="Qualidade",
-                    size="Market_Share", 
-                    text="Concorrente",
-                    title="Mapa de Posicionamento Competitivo")
+@memoize_figure
+def create_persona_radar(df_profiles):
+    """Cria radar com a pontuação média de cada persona na base de clientes."""
+    fig = px.line_polar(df_profiles, r="Pontuacao",
+                       theta="Categoria",
+                       color="Persona",
+                       line_close=True,
+                       range_r=(0, 100),
+                       title="Perfil de Necessidades por Persona")
+    return fig
+
+@memoize_figure
+def create_competitor_map(df_competitors, pobishop=None, label_top_n=LABEL_TOP_N):
+    """Cria mapa de posicionamento dos concorrentes.
+
+    `pobishop` é a posição (preço, qualidade) calculada a partir dos produtos.
+    """
+    if len(df_competitors) > LARGE_DATA_THRESHOLD:
+        fig = _large_scatter(df_competitors, "Preco", "Qualidade", "Market_Share",
+                             "Concorrente", "Mapa de Posicionamento Competitivo", label_top_n)
+    else:
+        fig = px.scatter(df_competitors, x="Preco", y="Qualidade",
+                        size="Market_Share", 
+                        text="Concorrente",
+                        title="Mapa de Posicionamento Competitivo")
     
-    # Adiciona Pobishop (posição estimada)
-    fig.add_trace(go.Scatter(
-        x=[32], y=[63],
-        mode="markers+text",
-        marker=dict(size=15, color="red"),
-        text=["Pobishop"],
-        name="Pobishop"
-    ))
+    if pobishop is not None:
+        fig.add_trace(go.Scatter(
+            x=[pobishop[0]], y=[pobishop[1]],
+            mode="markers+text",
+            marker=dict(size=15, color="red"),
+            text=["Pobishop"],
+            name="Pobishop"
+        ))
     
-    fig.update_layout(xaxis_title="Preço (menor é mais caro)", 
+    fig.update_layout(xaxis_title="Preço Mediano (R$)", 
                      yaxis_title="Qualidade Percebida")
     return fig
 
+@memoize_figure
 def create_market_share(df_competitors):
     """Cria gráfico de market share."""
     fig = px.pie(df_competitors, values="Market_Share", 
@@ -101,25 +323,39 @@ def create_market_share(df_competitors):
                 title="Market Share dos Concorrentes")
     return fig
 
-def create_product_treemap(df_products):
-    """Cria treemap de produtos por categoria e margem."""
-    fig = px.treemap(df_products, 
-                    path=["Categoria", "Produto"],
-                    values="Margem",
-                    color="Demanda",
-                    title="Volume e Margem por Categoria/Produto")
+@memoize_figure
+def create_product_treemap(df_products, top_n=HIERARCHY_TOP_N, focus=()):
+    """Cria treemap de produtos por categoria e margem.
+
+    Cada categoria mostra os `top_n` produtos de maior margem e um nó
+    "Outros"; `focus=(categoria,)` detalha uma única categoria.
+    """
+    df_nodes = aggregate_hierarchy(df_products, ["Categoria", "Produto"], "Margem", "Demanda",
+                                   top_n=top_n, focus=focus)
+    fig = go.Figure(_hierarchy_trace(go.Treemap, df_nodes, "Margem", "Demanda",
+                                     colorscale="Plasma", colorbar=dict(title="Demanda")))
+    title = "Volume e Margem por Categoria/Produto"
+    if focus:
+        title += ": " + " / ".join(map(str, focus))
+    fig.update_layout(title=title)
     return fig
 
-def create_price_demand(df_products):
+@memoize_figure
+def create_price_demand(df_products, label_top_n=LABEL_TOP_N):
     """Cria scatter plot de preço vs. demanda."""
-    fig = px.scatter(df_products, x="Preco", y="Demanda",
-                    size="Margem", 
-                    text="Produto",
-                    title="Preço vs. Demanda Potencial")
+    if len(df_products) > LARGE_DATA_THRESHOLD:
+        fig = _large_scatter(df_products, "Preco", "Demanda", "Margem",
+                             "Produto", "Preço vs. Demanda Potencial", label_top_n)
+    else:
+        fig = px.scatter(df_products, x="Preco", y="Demanda",
+                        size="Margem", 
+                        text="Produto",
+                        title="Preço vs. Demanda Potencial")
     fig.update_layout(xaxis_title="Preço (R$)", 
                      yaxis_title="Demanda Potencial")
     return fig
 
+@memoize_figure
 def create_revenue_chart(df_revenue):
     """Cria gráfico de área para receita projetada."""
     fig = px.area(df_revenue, x="Trimestre", y="Receita",
@@ -128,6 +364,7 @@ def create_revenue_chart(df_revenue):
                      yaxis_title="Receita (R$)")
     return fig
 
+@memoize_figure
 def create_investment_chart(df_investment):
     """Cria gráfico de barras para investimento inicial."""
     fig = px.bar(df_investment, x="Categoria", y="Investimento",
@@ -136,39 +373,154 @@ def create_investment_chart(df_investment):
                      yaxis_title="Investimento (R$)")
     return fig
 
-def create_risk_heatmap(df_risk):
-    """Cria mapa de calor para riscos."""
-    fig = px.density_heatmap(df_risk, x="Probabilidade", y="Impacto",
-                            z=df_risk["Probabilidade"] * df_risk["Impacto"],
-                            hover_name="Risco", 
-                            title="Matriz de Riscos")
+# Resolução da matriz de riscos (células por eixo)
+RISK_GRID_BINS = 10
+
+@memoize_figure
+def create_risk_heatmap(df_risk, bins=None):
+    """Cria mapa de calor para riscos.
     
-    # Adiciona os nomes dos riscos
-    for i, row in df_risk.iterrows():
-        fig.add_annotation(
-            x=row["Probabilidade"],
-            y=row["Impacto"],
-            text=row["Risco"],
-            showarrow=False
-        )
+    Com `bins` (automático acima de LARGE_DATA_THRESHOLD riscos), os riscos
+    são agrupados numa grade fixa e cada célula mostra a contagem.
+    """
+    probabilidade = df_risk["Probabilidade"].to_numpy(dtype=np.float64)
+    impacto = df_risk["Impacto"].to_numpy(dtype=np.float64)
+    score = probabilidade * impacto
+    if bins is None and len(df_risk) > LARGE_DATA_THRESHOLD:
+        bins = RISK_GRID_BINS
+    
+    # Fundo: severidade (probabilidade x impacto) em cada célula da matriz
+    grid_bins = bins or RISK_GRID_BINS
+    centers = (np.arange(grid_bins) + 0.5) / grid_bins
+    fig = go.Figure(go.Heatmap(
+        x=centers, y=centers,
+        z=np.outer(centers, centers),
+        colorscale="YlOrRd",
+        colorbar=dict(title="Prob. x Impacto"),
+        hoverinfo="skip"
+    ))
+    
+    if bins:
+        edges = np.linspace(0, 1, bins + 1)
+        counts, _, _ = np.histogram2d(impacto, probabilidade, bins=[edges, edges])
+        score_sums, _, _ = np.histogram2d(impacto, probabilidade, bins=[edges, edges], weights=score)
+        rows, cols = np.nonzero(counts)
+        fig.add_trace(go.Scatter(
+            x=centers[cols], y=centers[rows],
+            mode="text",
+            text=counts[rows, cols].astype(int).astype(str),
+            customdata=score_sums[rows, cols] / counts[rows, cols],
+            hovertemplate=("Probabilidade: %{x:.2f}<br>Impacto: %{y:.2f}<br>"
+                           "Riscos: %{text}<br>Score médio: %{customdata:.2f}<extra></extra>"),
+            name="Riscos"
+        ))
+    else:
+        # Todos os rótulos num único trace de texto
+        fig.add_trace(go.Scatter(
+            x=probabilidade, y=impacto,
+            mode="markers+text",
+            text=df_risk["Risco"],
+            textposition="top center",
+            marker=dict(size=8, color="black"),
+            customdata=score,
+            hovertemplate=("<b>%{text}</b><br>Probabilidade: %{x:.2f}<br>"
+                           "Impacto: %{y:.2f}<br>Score: %{customdata:.2f}<extra></extra>"),
+            name="Riscos"
+        ))
     
-    fig.update_layout(xaxis_title="Probabilidade", 
-                     yaxis_title="Impacto")
+    fig.update_layout(title="Matriz de Riscos",
+                     xaxis_title="Probabilidade", 
+                     yaxis_title="Impacto",
+                     xaxis=dict(range=[0, 1]),
+                     yaxis=dict(range=[0, 1]),
+                     showlegend=False)
     return fig
 
+# Sem memoize_figure: poucas barras, montar custa quase o mesmo que hashear
+# a entrada e desserializar o JSON em cache
 def create_supplier_chart(df_suppliers):
-    """Cria gráfico de barras para prazos de entrega."""
-    fig = px.bar(df_suppliers, x="Fornecedor", y="Prazo_Entrega",
-                color="Origem",
-                title="Prazos de Entrega por Fornecedor")
-    fig.update_layout(xaxis_title="Fornecedor", 
+    """Cria gráfico de barras com os prazos de entrega medidos (p50, p90 e p99)."""
+    fig = go.Figure()
+    for column, name, color in [("P50", "Mediana (p50)", "#1f77b4"),
+                                ("P90", "p90", "#ff7f0e"),
+                                ("P99", "p99", "#d62728")]:
+        fig.add_trace(go.Bar(
+            x=df_suppliers["Fornecedor"], y=df_suppliers[column], name=name,
+            marker_color=color,
+            hovertemplate="%{x}<br>" + name + ": %{y:.1f} dias<extra></extra>"
+        ))
+    fig.add_trace(go.Scatter(
+        x=df_suppliers["Fornecedor"], y=df_suppliers["Prazo_Entrega"],
+        mode="markers", name="Prazo prometido",
+        marker=dict(symbol="line-ew-open", size=40, color="black", line=dict(width=2))
+    ))
+    fig.update_layout(title="Prazos de Entrega por Fornecedor",
+                     barmode="group",
+                     xaxis_title="Fornecedor", 
                      yaxis_title="Prazo de Entrega (dias)")
     return fig
 
-def create_product_flow(df_suppliers):
-    """Cria gráfico de fluxo de produtos (sunburst)."""
-    fig = px.sunburst(df_suppliers,
-                     path=["Origem", "Fornecedor"],
-                     values="Prazo_Entrega",
-                     title="Fluxo de Fornecimento de Produtos")
+@memoize_figure
+def create_product_flow(df_suppliers, top_n=HIERARCHY_TOP_N, focus=()):
+    """Cria gráfico de fluxo de produtos (sunburst) por volume e pontualidade.
+
+    Cada origem mostra os `top_n` fornecedores com mais pedidos e um nó
+    "Outros"; `focus=(origem,)` detalha uma única origem.
+    """
+    df_flow = df_suppliers.assign(No_Prazo=df_suppliers["Taxa_No_Prazo"] * 100)
+    df_nodes = aggregate_hierarchy(df_flow, ["Origem", "Fornecedor"], "Pedidos", "No_Prazo",
+                                   top_n=top_n, focus=focus)
+    fig = go.Figure(_hierarchy_trace(go.Sunburst, df_nodes, "Pedidos", "No prazo (%)",
+                                     colorscale="RdYlGn", cmin=0, cmax=100,
+                                     colorbar=dict(title="No prazo (%)")))
+    title = "Fluxo de Fornecimento de Produtos"
+    if focus:
+        title += ": " + " / ".join(map(str, focus))
+    fig.update_layout(title=title)
+    return fig
+
+# Sem memoize_figure: cada movimento dos sliders gera um grid novo e o JSON
+# de um heatmap grande custa mais para ler do cache do que para montar
+def create_margin_heatmap(df_grid, title="Preço de Venda Médio por Imposto e Margem"):
+    """Cria heatmap de sensibilidade do preço (linhas: imposto, colunas: margem)."""
+    fig = go.Figure(go.Heatmap(
+        z=df_grid.to_numpy(),
+        x=df_grid.columns,
+        y=df_grid.index,
+        colorscale="Viridis",
+        colorbar=dict(title="R$"),
+        hovertemplate="Imposto: %{y}%<br>Margem: %{x}%<br>Preço: R$ %{z:.2f}<extra></extra>"
+    ))
+    fig.update_layout(title=title,
+                     xaxis_title="Margem Desejada (%)",
+                     yaxis_title="Taxa de Importação (%)")
+    return fig
+
+@memoize_figure
+def create_fan_chart(df_bands, title, yaxis_title):
+    """Cria fan chart com as faixas de percentis (P5-P95, P25-P75 e mediana)."""
+    fig = go.Figure()
+    for low, high, name, color in [("P5", "P95", "P5-P95", "rgba(31, 119, 180, 0.15)"),
+                                   ("P25", "P75", "P25-P75", "rgba(31, 119, 180, 0.35)")]:
+        fig.add_trace(go.Scatter(x=df_bands["Mes"], y=df_bands[high], mode="lines",
+                                 line=dict(width=0), showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=df_bands["Mes"], y=df_bands[low], mode="lines",
+                                 line=dict(width=0), fill="tonexty", fillcolor=color,
+                                 name=name, hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=df_bands["Mes"], y=df_bands["P50"], mode="lines",
+                             line=dict(color="rgb(31, 119, 180)", width=2), name="Mediana",
+                             hovertemplate="Mês %{x}<br>R$ %{y:,.0f}<extra></extra>"))
+    fig.update_layout(title=title,
+                     xaxis_title="Mês de Operação",
+                     yaxis_title=yaxis_title)
+    return fig
+
+@memoize_figure
+def create_break_even_chart(df_break_even):
+    """Cria gráfico de barras com a distribuição do mês de equilíbrio."""
+    fig = px.bar(df_break_even, x=df_break_even["Mes"].astype(str), y="Probabilidade",
+                title="Distribuição do Ponto de Equilíbrio")
+    fig.update_layout(xaxis_title="Mês de Operação",
+                     yaxis_title="Probabilidade",
+                     yaxis_tickformat=".0%")
     return fig